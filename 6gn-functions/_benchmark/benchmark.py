@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the collision-detector engines on synthetic fleets.
+Times detect_collisions for every engine, geometry and fleet size, records the peak memory of each run,
+checks that all engines return the same verdicts, and writes everything as JSON.
+
+    python benchmark.py --output results.json
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import tracemalloc
+from copy import deepcopy
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "collision-detector"))
+
+from collision_detector import get_engine  # noqa: E402
+from cpa import fleet_origin  # noqa: E402
+from enu import enu_state  # noqa: E402
+from utility import haversine, predict_future_positions  # noqa: E402
+from fleet_generator import GEOMETRIES, generate_fleet  # noqa: E402
+
+# same settings as collision-detector/fn.py
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20
+VERTICAL_SEPARATION = 300
+
+SIZES = (10, 100, 1000, 10000)
+ENGINES = ("python", "numpy", "parallel")
+PYTHON_DENSE_LIMIT = 1000  # the pairwise loop without broad phase takes minutes beyond this fleet size
+TOLERANCE = 1e-6  # engines differ in floating point summation order
+
+
+def run_engine(engine, fleet, settings):
+    detect_collisions = get_engine(engine)
+    return detect_collisions(deepcopy(fleet), TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION, VERTICAL_SEPARATION,
+                             **settings)
+
+
+def time_engine(engine, fleet, settings, repeat):
+    """
+    Returns:
+        (best wall time in seconds, result of the last run)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run_engine(engine, fleet, settings)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(engine, fleet, settings):
+    """
+    Peak Python heap (NumPy buffers included) allocated by one run, measured apart from the timed runs
+    because tracing slows the interpreter down. Worker processes of the parallel engine are not traced.
+    """
+    tracemalloc.start()
+    try:
+        run_engine(engine, fleet, settings)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def same_verdicts(result, reference):
+    """
+    Compare two (collision, aircraft_list, conflicts) results of detect_collisions.
+
+    Returns:
+        list of the differences found, empty if the verdicts match
+    """
+    differences = []
+    if result[0] != reference[0]:
+        differences.append("collision")
+    flagged = [index for index, aircraft in enumerate(result[1]) if aircraft.get("collision")]
+    reference_flagged = [index for index, aircraft in enumerate(reference[1]) if aircraft.get("collision")]
+    if flagged != reference_flagged:
+        differences.append("flagged aircraft")
+    if [conflict["uav_ids"] for conflict in result[2]] != [conflict["uav_ids"] for conflict in reference[2]]:
+        differences.append("conflicting pairs")
+    elif any(abs(conflict[key] - other[key]) > TOLERANCE for conflict, other in zip(result[2], reference[2])
+             for key in ("time_to_conflict", "min_separation")):
+        differences.append("conflict details")
+    return differences
+
+
+def benchmark_primitives(fleet, number):
+    """
+    Calls per second of the per-aircraft and per-pair primitives the pairwise engine is built on.
+    """
+    aircraft1, aircraft2 = fleet[0], fleet[-1]
+    origin = fleet_origin(fleet)
+    primitives = {
+        "haversine": lambda: haversine(aircraft1["latitude"], aircraft1["longitude"],
+                                       aircraft2["latitude"], aircraft2["longitude"]),
+        "predict_future_positions": lambda: predict_future_positions(aircraft1, TIME_INTERVAL, NUM_STEPS),
+        "enu_state": lambda: enu_state(aircraft1, origin),
+    }
+    return {name: {"calls_per_sec": number / min(timeit.repeat(call, number=number, repeat=3))}
+            for name, call in primitives.items()}
+
+
+def benchmark(sizes, geometries, engines, settings, seed, repeat):
+    results = []
+    for geometry in geometries:
+        for size in sizes:
+            fleet = generate_fleet(size, geometry, seed)
+            pairs = size * (size - 1) // 2
+            reference = None
+            for engine in engines:
+                entry = {"geometry": geometry, "size": size, "engine": engine, "pairs": pairs}
+                if engine == "python" and not settings["broad_phase"] and size > PYTHON_DENSE_LIMIT:
+                    entry["skipped"] = f"pairwise loop without broad phase above {PYTHON_DENSE_LIMIT} UAVs"
+                    results.append(entry)
+                    continue
+                seconds, result = time_engine(engine, fleet, settings, repeat)
+                entry.update({
+                    "seconds": seconds,
+                    "pairs_per_sec": pairs / seconds if seconds > 0 else None,
+                    "peak_memory_bytes": peak_memory(engine, fleet, settings),
+                    "conflicts": len(result[2]),
+                    "flagged": sum(1 for aircraft in result[1] if aircraft.get("collision")),
+                })
+                if reference is None:
+                    reference = engine, result
+                entry["parity_reference"] = reference[0]
+                entry["parity_differences"] = same_verdicts(result, reference[1])
+                entry["parity"] = not entry["parity_differences"]
+                results.append(entry)
+                print(f'{geometry:>9} {size:>6} {engine:>8}: {seconds:9.4f} s  {entry["pairs_per_sec"]:14.0f} pairs/s  '
+                      f'{entry["peak_memory_bytes"] / 2 ** 20:8.1f} MiB  {entry["conflicts"]:>7} conflicts  '
+                      f'parity={entry["parity"]}', file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--geometries", nargs="+", choices=GEOMETRIES, default=list(GEOMETRIES))
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one is reported")
+    parser.add_argument("--no-broad-phase", dest="broad_phase", action="store_false")
+    parser.add_argument("--conflict-test", choices=("sampled", "cpa"), default="sampled")
+    parser.add_argument("--projection", choices=("enu", "great_circle"), default="enu")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file, '-' for stdout")
+    args = parser.parse_args()
+
+    settings = {"broad_phase": args.broad_phase, "conflict_test": args.conflict_test, "projection": args.projection}
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "settings": dict(settings, time_interval=TIME_INTERVAL, num_steps=NUM_STEPS,
+                         horizontal_separation=HORIZONTAL_SEPARATION, vertical_separation=VERTICAL_SEPARATION),
+        "primitives": benchmark_primitives(generate_fleet(2, "uniform", args.seed), number=10000),
+        "results": benchmark(args.sizes, args.geometries, args.engines, settings, args.seed, args.repeat),
+    }
+    report["parity"] = all(entry.get("parity", True) for entry in report["results"])
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    return 0 if report["parity"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
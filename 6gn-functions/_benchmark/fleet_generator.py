@@ -0,0 +1,101 @@
+import random
+from math import radians, degrees, cos, sin, sqrt
+
+R = 6371.0  # Radius of the Earth in kilometers
+
+GEOMETRIES = ("uniform", "clustered", "head_on", "crossing")
+
+# defaults of the generated fleets, in the units of the collision-detector input
+CENTER = (45.4642, 9.1900)  # (latitude, longitude)
+DENSITY = 1.0  # UAVs per square kilometer
+ALTITUDE = (100.0, 1000.0)  # meters
+SPEED = (20.0, 90.0)  # km/h
+VERTICAL_SPEED = 5.0  # m/s, +-
+CLUSTER_SIZE = 50  # UAVs per cluster
+CLUSTER_RADIUS = 0.5  # km, standard deviation of a cluster
+HEAD_ON_GAP = 1.0  # km between the two UAVs of a head-on pair
+
+
+def offset_position(center, east, north):
+    """
+    Latitude and longitude of the point east/north kilometers away from center (small offsets).
+    """
+    latitude = center[0] + degrees(north / R)
+    longitude = center[1] + degrees(east / (R * cos(radians(center[0]))))
+    return latitude, longitude
+
+
+def make_uav(index, center, east, north, altitude, speed, direction, vertical_speed):
+    latitude, longitude = offset_position(center, east, north)
+    return {"uav_id": f"{index:05d}", "uav_type": str(1 + index % 2), "latitude": latitude, "longitude": longitude,
+            "altitude": altitude, "speed": speed, "direction": direction % 360, "vertical_speed": vertical_speed}
+
+
+def generate_fleet(size, geometry="uniform", seed=0, center=CENTER, density=DENSITY):
+    """
+    Synthetic fleet for benchmarking the collision detector. The same (size, geometry, seed) always
+    yields the same fleet.
+    Args:
+        size: number of UAVs
+        geometry: 'uniform' (random positions and headings), 'clustered' (gaussian clusters of CLUSTER_SIZE),
+            'head_on' (pairs flying towards each other HEAD_ON_GAP apart) or 'crossing' (two perpendicular flows
+            on parallel lanes)
+        seed: seed of the random generator
+        center: (latitude, longitude) of the area
+        density: UAVs per square kilometer, sets the side of the area
+
+    Returns:
+        list of dictionaries in the format of the collision-detector input data
+    """
+    rng = random.Random(seed)
+    side = sqrt(size / density)  # km
+
+    def altitude():
+        return rng.uniform(*ALTITUDE)
+
+    def speed():
+        return rng.uniform(*SPEED)
+
+    def vertical_speed():
+        return rng.uniform(-VERTICAL_SPEED, VERTICAL_SPEED)
+
+    def anywhere():
+        return rng.uniform(-side / 2, side / 2), rng.uniform(-side / 2, side / 2)
+
+    fleet = []
+    if geometry == "uniform":
+        for index in range(size):
+            east, north = anywhere()
+            fleet.append(make_uav(index, center, east, north, altitude(), speed(), rng.uniform(0, 360),
+                                  vertical_speed()))
+    elif geometry == "clustered":
+        clusters = [anywhere() for _ in range(max(1, size // CLUSTER_SIZE))]
+        for index in range(size):
+            cluster_east, cluster_north = rng.choice(clusters)
+            fleet.append(make_uav(index, center, rng.gauss(cluster_east, CLUSTER_RADIUS),
+                                  rng.gauss(cluster_north, CLUSTER_RADIUS), altitude(), speed(),
+                                  rng.uniform(0, 360), vertical_speed()))
+    elif geometry == "head_on":
+        for index in range(0, size, 2):
+            east, north = anywhere()
+            bearing = rng.uniform(0, 360)
+            half_east, half_north = HEAD_ON_GAP / 2 * sin(radians(bearing)), HEAD_ON_GAP / 2 * cos(radians(bearing))
+            level, pace = altitude(), speed()
+            # the first UAV flies along bearing towards the second, which flies the opposite way
+            fleet.append(make_uav(index, center, east - half_east, north - half_north, level, pace, bearing, 0.0))
+            if index + 1 < size:
+                fleet.append(make_uav(index + 1, center, east + half_east, north + half_north, level, pace,
+                                      bearing + 180, 0.0))
+    elif geometry == "crossing":
+        lanes = max(1, int(sqrt(size / 2)))
+        spacing = side / lanes
+        for index in range(size):
+            lane = rng.randrange(lanes) * spacing - side / 2 + spacing / 2
+            along = rng.uniform(-side / 2, side / 2)
+            if index % 2 == 0:  # eastbound flow on horizontal lanes
+                fleet.append(make_uav(index, center, along, lane, altitude(), speed(), 90, vertical_speed()))
+            else:  # northbound flow on vertical lanes
+                fleet.append(make_uav(index, center, lane, along, altitude(), speed(), 0, vertical_speed()))
+    else:
+        raise ValueError(f'Unknown geometry: {geometry}')
+    return fleet
@@ -3,7 +3,7 @@ from datetime import datetime
 
 HOST = "localhost"
 PORT = 1883
-TOPIC = "releases"
+TOPIC = "releases/#"  # every releases/<uav_id> topic and the aggregate releases topic
 QoS = 1  # at least once
 
 def on_connect(client, userdata, flags, rc, properties=None):
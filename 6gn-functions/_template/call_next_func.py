@@ -1,6 +1,8 @@
-import requests
 import logging
 
+from http_session import get_session, HTTP_TIMEOUT
+from codec import encode_payload
+
 host = "172.17.0.1"
 # host = "host.docker.internal"
 
@@ -11,7 +13,6 @@ logger = logging.getLogger(__name__)
 def post_(data, meta):
     url = f"http://{host}:8000/???"
     headers = {
-        "Content-Type": "application/json",
         "X-tinyFaaS-Async": "true"}  # tinyfaas will return a 202 response
 
     payload = {
@@ -19,7 +20,8 @@ def post_(data, meta):
         "meta": meta
     }
     logger.debug(f'[??? fn] calling ??? function on {url} with payload: {payload}')
-    response = requests.post(url, headers=headers, json=payload)
+    headers['Content-Type'], body = encode_payload(payload)  # msgpack or JSON, see codec.py
+    response = get_session().post(url, headers=headers, data=body, timeout=HTTP_TIMEOUT)
     if response.status_code != 202:  # async call
         logger.error(f'[??? fn] Error calling ??? function ({response.status_code}): {response.text}')
     else:
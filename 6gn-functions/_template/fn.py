@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
-import json
 import typing
 import logging
 
 from call_next_func import post_
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
+from codec import decode_payload, input_attribute
 
 # Set up Python logger. milliseconds are not supported by default
 logging.basicConfig(
@@ -21,18 +21,18 @@ for handler in logging.getLogger().handlers:  # Apply the custom formatter to th
 # Initialize the OpenTelemetry tracer
 tracer = TracerInitializer("???").tracer
 
-def fn(input: typing.Optional[str]) -> typing.Optional[str]:
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
     """
     input:
     output:
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[??? fn] invoke count: {str(Counter.get_count())}')
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[??? fn] Parsed input: {parsed_input}')
 
             data = parsed_input.get('data', [])
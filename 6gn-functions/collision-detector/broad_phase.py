@@ -0,0 +1,101 @@
+from math import radians, degrees, cos, sin, asin, floor
+from collections import defaultdict
+
+R = 6371.0  # Radius of the Earth in kilometers
+
+
+def swept_box(positions):
+    """
+    Bounding box of the predicted path of an aircraft over the prediction horizon.
+    Motion is linear, so the first and last predicted positions bound every step in between.
+    Args:
+        positions: list of future positions of the aircraft, see utility.predict_future_positions
+
+    Returns:
+        (min_lat, max_lat, min_lon, max_lon, min_alt, max_alt)
+    """
+    first, last = positions[0], positions[-1]
+    return (min(first["latitude"], last["latitude"]), max(first["latitude"], last["latitude"]),
+            min(first["longitude"], last["longitude"]), max(first["longitude"], last["longitude"]),
+            min(first["altitude"], last["altitude"]), max(first["altitude"], last["altitude"]))
+
+
+def separation_margins(boxes, horizontal_separation, vertical_separation):
+    """
+    Smallest latitude/longitude/altitude gaps that guarantee a haversine distance of at least
+    horizontal_separation (or a vertical distance of at least vertical_separation).
+    From the haversine formula: distance >= R * dlat, and
+    sin(dlon / 2) <= sin(distance / 2R) / cos(lat) for the largest |lat| of the fleet.
+
+    Returns:
+        (lat_margin, lon_margin, alt_margin) in degrees, degrees and meters, or None if the
+        fleet is too close to a pole or the antimeridian for the bound to hold
+    """
+    lat_margin = degrees(horizontal_separation / R)
+    max_abs_lat = max(max(abs(box[0]), abs(box[1])) for box in boxes) + lat_margin
+    if max_abs_lat >= 90:
+        return None
+    ratio = sin(horizontal_separation / (2 * R)) / cos(radians(max_abs_lat))
+    if ratio >= 1:
+        return None
+    lon_margin = degrees(2 * asin(ratio))
+    if any(box[2] - lon_margin < -180 or box[3] + lon_margin > 180 for box in boxes):
+        return None
+    return lat_margin, lon_margin, vertical_separation
+
+
+def candidate_partners(boxes, horizontal_separation, vertical_separation, margins=None):
+    """
+    Broad-phase stage: put every swept bounding box (grown by half the separation margins on each side)
+    into a uniform grid and keep only the pairs whose boxes overlap.
+    Pairs that are pruned can never be within the separation minima inside the horizon, so the
+    narrow-phase check only has to run on the returned candidates.
+    Args:
+        boxes: swept box of every aircraft, see swept_box
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+        margins: separation margins along the three box axes, for boxes in a planar frame (see enu.enu_swept_box);
+            derived from the haversine bound when the boxes are in latitude/longitude/altitude
+
+    Returns:
+        list where item i is the sorted list of candidate partners j > i
+    """
+    n = len(boxes)
+    if n < 2:
+        return [[] for _ in range(n)]
+
+    if margins is None:
+        margins = separation_margins(boxes, horizontal_separation, vertical_separation)
+    if margins is None:  # bound does not hold, every pair is a candidate
+        return [list(range(i + 1, n)) for i in range(n)]
+
+    half = [margin / 2 for margin in margins]
+    grown = [(box[0] - half[0], box[1] + half[0], box[2] - half[1], box[3] + half[1], box[4] - half[2], box[5] + half[2])
+             for box in boxes]
+
+    # cells at least as large as the margin, and as large as the average box so that fast movers stay in few cells
+    cell_size = [max(margins[axis], sum(box[2 * axis + 1] - box[2 * axis] for box in grown) / n, 1e-9) for axis in range(3)]
+
+    grid = defaultdict(list)
+    for index, box in enumerate(grown):
+        lo = [floor(box[2 * axis] / cell_size[axis]) for axis in range(3)]
+        hi = [floor(box[2 * axis + 1] / cell_size[axis]) for axis in range(3)]
+        for x in range(lo[0], hi[0] + 1):
+            for y in range(lo[1], hi[1] + 1):
+                for z in range(lo[2], hi[2] + 1):
+                    grid[(x, y, z)].append(index)
+
+    candidates = set()
+    for members in grid.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                candidates.add((members[a], members[b]))  # members are appended in index order, so a < b
+
+    partners = [[] for _ in range(n)]
+    for i, j in candidates:
+        box1, box2 = grown[i], grown[j]
+        if all(box1[2 * axis] <= box2[2 * axis + 1] and box2[2 * axis] <= box1[2 * axis + 1] for axis in range(3)):
+            partners[i].append(j)
+    for partner_list in partners:
+        partner_list.sort()
+    return partners
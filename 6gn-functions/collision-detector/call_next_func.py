@@ -1,6 +1,8 @@
-import requests
 import logging
 
+from http_session import get_session, HTTP_TIMEOUT
+from codec import encode_payload
+
 host = "172.17.0.1"
 # host = "host.docker.internal"
 
@@ -9,18 +11,19 @@ host = "172.17.0.1"
 logger = logging.getLogger(__name__)
 
 
-def post_mutate(data, meta, result):
+def post_mutate(data, meta, result, conflicts=None):
     url = f"http://{host}:8000/mutate"
     headers = {
-        "Content-Type": "application/json",
         "X-tinyFaaS-Async": "true"}  # tinyfaas will return a 202 response
 
     payload = {
         "data": data,
-        "meta": meta
+        "meta": meta,
+        "conflicts": conflicts or []  # every conflicting pair, see collision_detector.conflict_record
     }
     logger.debug(f'[collision-detector fn] calling mutate function on {url} with payload: {payload}')
-    response = requests.post(url, headers=headers, json=payload)
+    headers['Content-Type'], body = encode_payload(payload)  # msgpack or JSON, see codec.py
+    response = get_session().post(url, headers=headers, data=body, timeout=HTTP_TIMEOUT)
     if response.status_code != 202:  # async call
         logger.error(f'[collision-detector fn] Error calling mutate function ({response.status_code}): {response.text}')
     else:
@@ -31,12 +34,12 @@ def post_mutate(data, meta, result):
 def post_release(input):
     url = f"http://{host}:8000/release"
     headers = {
-        "Content-Type": "application/json",
         "X-tinyFaaS-Async": "true"}  # tinyfaas will return a 202 response
 
     payload = input
     logger.debug(f'[collision-detector fn] calling release function on {url} with payload: {payload}')
-    response = requests.post(url, headers=headers, json=payload)
+    headers['Content-Type'], body = encode_payload(payload)  # msgpack or JSON, see codec.py
+    response = get_session().post(url, headers=headers, data=body, timeout=HTTP_TIMEOUT)
     if response.status_code != 202:  # async call
         logger.error(f'[collision-detector fn] Error calling release function ({response.status_code}): {response.text}')
     else:
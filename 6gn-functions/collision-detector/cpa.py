@@ -0,0 +1,93 @@
+from math import radians, cos, sin, sqrt, inf
+
+R = 6371.0  # Radius of the Earth in kilometers
+
+
+def fleet_origin(aircraft_list):
+    """
+    Origin of the local frame: the centroid of the current fleet positions.
+
+    Returns:
+        (latitude, longitude) in degrees
+    """
+    n = len(aircraft_list)
+    return (sum(aircraft["latitude"] for aircraft in aircraft_list) / n,
+            sum(aircraft["longitude"] for aircraft in aircraft_list) / n)
+
+
+def local_state(aircraft, origin):
+    """
+    Position and velocity of the aircraft in a local equirectangular frame around origin.
+    The velocity follows the motion model of utility.predict_future_positions.
+    Args:
+        aircraft: dictionary containing the current position and motion parameters of the aircraft
+        origin: (latitude, longitude) of the frame origin, see fleet_origin
+
+    Returns:
+        (x, y, z, vx, vy, vz): x east and y north in km, z in meters, velocities per second
+    """
+    scale_x = R * cos(radians(origin[0]))
+    speed_kms = aircraft["speed"] / 3600  # Convert speed from km/h to km/s
+    return (scale_x * radians(aircraft["longitude"] - origin[1]),
+            R * radians(aircraft["latitude"] - origin[0]),
+            aircraft["altitude"],
+            scale_x * radians(speed_kms * cos(radians(90 - aircraft["direction"]))),
+            R * radians(speed_kms * sin(radians(90 - aircraft["direction"]))),
+            aircraft["vertical_speed"])
+
+
+def closest_point_of_approach(state1, state2, horizon, horizontal_separation, vertical_separation):
+    """
+    Closed-form conflict test between two aircraft moving in straight lines, over the interval [0, horizon].
+    Horizontal conflict holds while |p + v t| < horizontal_separation (a quadratic in t), vertical conflict
+    holds while |dz + dvz t| < vertical_separation (linear in t); the pair is in conflict if both
+    intervals overlap inside the horizon.
+    Args:
+        state1, state2: local states of the two aircraft, see local_state
+        horizon: last predicted time
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+
+    Returns:
+        (time_to_conflict, time_of_cpa, horizontal distance at cpa); time_to_conflict is None if there is no conflict
+    """
+    px, py, pz = state2[0] - state1[0], state2[1] - state1[1], state2[2] - state1[2]
+    vx, vy, vz = state2[3] - state1[3], state2[4] - state1[4], state2[5] - state1[5]
+
+    a = vx * vx + vy * vy
+    b = 2 * (px * vx + py * vy)
+    c = px * px + py * py - horizontal_separation ** 2
+    if a > 0:
+        time_of_cpa = min(max(-b / (2 * a), 0), horizon)
+        discriminant = b * b - 4 * a * c
+        if discriminant > 0:
+            root = sqrt(discriminant)
+            horizontal_interval = ((-b - root) / (2 * a), (-b + root) / (2 * a))
+        else:
+            horizontal_interval = (inf, -inf)
+    else:  # same horizontal velocity, the distance never changes
+        time_of_cpa = 0
+        horizontal_interval = (-inf, inf) if c < 0 else (inf, -inf)
+
+    if vz != 0:
+        bounds = ((-vertical_separation - pz) / vz, (vertical_separation - pz) / vz)
+        vertical_interval = (min(bounds), max(bounds))
+    else:
+        vertical_interval = (-inf, inf) if abs(pz) < vertical_separation else (inf, -inf)
+
+    distance_at_cpa = sqrt((px + vx * time_of_cpa) ** 2 + (py + vy * time_of_cpa) ** 2)
+    start = max(0, horizontal_interval[0], vertical_interval[0])
+    end = min(horizon, horizontal_interval[1], vertical_interval[1])
+    return (start if start <= end else None), time_of_cpa, distance_at_cpa
+
+
+def check_for_conflict_cpa(state1, state2, horizon, horizontal_separation, vertical_separation):
+    """
+    Constant-time alternative of collision_detector.check_for_conflict, without sampling blind spots.
+
+    Returns:
+        Boolean: True if conflict is detected, False otherwise.
+    """
+    time_to_conflict, _, _ = closest_point_of_approach(state1, state2, horizon, horizontal_separation,
+                                                       vertical_separation)
+    return time_to_conflict is not None
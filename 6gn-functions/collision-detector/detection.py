@@ -0,0 +1,61 @@
+import os
+import logging
+
+from collision_detector import get_engine
+from incremental_detector import ConflictTable, detect_collisions_incremental
+
+logger = logging.getLogger(__name__)
+
+# collision-detector.py
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20   # 200m
+VERTICAL_SEPARATION   = 300    # metri
+COLLISION_ENGINE = os.getenv("COLLISION_ENGINE", "python")  # 'python' (pairwise loop), 'numpy' or 'parallel'
+# 'parallel' is tuned with PARALLEL_WORKERS and PARALLEL_MIN_FLEET, see parallel_detector.py
+BROAD_PHASE = os.getenv("BROAD_PHASE", "true").lower() == "true"  # prune far-apart pairs before the narrow-phase check
+CONFLICT_TEST = os.getenv("CONFLICT_TEST", "sampled")  # 'sampled' (NUM_STEPS positions) or 'cpa' (closed form)
+# 'enu' (local tangent plane in meters) or 'great_circle' (original lat/lon prediction + haversine, for validation)
+PROJECTION = os.getenv("PROJECTION", "enu")
+INCREMENTAL_DETECTION = os.getenv("INCREMENTAL_DETECTION", "false").lower() == "true"  # re-check only changed UAVs
+
+detect_collisions = get_engine(COLLISION_ENGINE)
+conflict_table = ConflictTable()  # verdicts of the incremental mode, kept between invocations
+logger.info(f'[collision-detector fn] using collision engine: {COLLISION_ENGINE}')
+
+
+def find_collisions(fleet, meta, tracer):
+    """
+    Collision detection of one invocation, with the configured engine, in a 'find_collisions' span.
+    Shared by the collision-detector function and the fused pipeline function.
+
+    Args:
+        fleet: Fleet of the recent trajectories
+        meta: request metadata, 'uav_id' limits the incremental mode to the reporting UAV
+        tracer: OpenTelemetry tracer of the calling function
+
+    Returns:
+        (collision_exists, flagged_fleet, conflicts)
+    """
+    with tracer.start_as_current_span('find_collisions', attributes={"engine": COLLISION_ENGINE,
+                                                                     "broad_phase": BROAD_PHASE,
+                                                                     "conflict_test": CONFLICT_TEST,
+                                                                     "projection": PROJECTION,
+                                                                     "incremental": INCREMENTAL_DETECTION}) as collision_span:
+        if INCREMENTAL_DETECTION:
+            collision_span.set_attribute("incremental_uav_id", str(meta.get('uav_id')))
+            collision_exists, flagged_fleet, conflicts = detect_collisions_incremental(
+                fleet, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION, VERTICAL_SEPARATION, conflict_table,
+                uav_id=meta.get('uav_id'), conflict_test=CONFLICT_TEST,
+                projection=PROJECTION)
+        else:
+            collision_exists, flagged_fleet, conflicts = detect_collisions(fleet, TIME_INTERVAL, NUM_STEPS,
+                                                                          HORIZONTAL_SEPARATION,
+                                                                          VERTICAL_SEPARATION,
+                                                                          broad_phase=BROAD_PHASE,
+                                                                          conflict_test=CONFLICT_TEST,
+                                                                          projection=PROJECTION)
+        collision_span.set_attribute("collision", collision_exists)
+        collision_span.set_attribute("conflicts", len(conflicts))
+        logger.debug(f'[collision-detector fn] Result of collision detection: {collision_exists}')
+    return collision_exists, flagged_fleet, conflicts
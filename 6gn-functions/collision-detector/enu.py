@@ -0,0 +1,71 @@
+from math import radians, cos, sin, sqrt, inf
+
+R = 6371000.0  # Radius of the Earth in meters
+
+
+def enu_state(aircraft, origin):
+    """
+    Position and velocity of the aircraft in the local east-north-up frame tangent to the Earth at origin.
+    The fleet is projected once per invocation, after which prediction and separation are plain linear
+    arithmetic in meters. Speed is in km/h and direction is the heading clockwise from north, as in
+    utility.predict_future_positions; headings are taken relative to the north of the origin, which holds
+    over a fleet spread of tens of kilometers.
+    Args:
+        aircraft: dictionary containing the current position and motion parameters of the aircraft
+        origin: (latitude, longitude) of the tangent point, see cpa.fleet_origin
+
+    Returns:
+        (east, north, up, v_east, v_north, v_up) in meters and meters per second; up is the altitude
+    """
+    lat, dlon = radians(aircraft["latitude"]), radians(aircraft["longitude"] - origin[1])
+    origin_lat = radians(origin[0])
+    speed_ms = aircraft["speed"] / 3.6  # Convert speed from km/h to m/s
+    heading = radians(aircraft["direction"])
+    return (R * cos(lat) * sin(dlon),
+            R * (cos(origin_lat) * sin(lat) - sin(origin_lat) * cos(lat) * cos(dlon)),
+            aircraft["altitude"],
+            speed_ms * sin(heading),
+            speed_ms * cos(heading),
+            aircraft["vertical_speed"])
+
+
+def enu_swept_box(state, horizon):
+    """
+    Bounding box of the straight path of an aircraft over [0, horizon], in the same layout as
+    broad_phase.swept_box: (min_east, max_east, min_north, max_north, min_up, max_up).
+    """
+    box = []
+    for axis in range(3):
+        start, end = state[axis], state[axis] + state[axis + 3] * horizon
+        box += [min(start, end), max(start, end)]
+    return tuple(box)
+
+
+def enu_conflict_details(state1, state2, time_interval, num_steps, horizontal_separation, vertical_separation):
+    """
+    Sampled conflict test of collision_detector.conflict_details, on two local states instead of two
+    predicted great-circle paths.
+    Args:
+        state1, state2: local states of the two aircraft, see enu_state
+        time_interval: time interval between each step
+        num_steps: number of steps to predict
+        horizontal_separation: critical horizontal distance for conflict detection, in meters
+        vertical_separation: critical vertical distance for conflict detection, in meters
+
+    Returns:
+        (time_to_conflict, min_separation): time of the first conflicting step (None if there is no conflict)
+        and the smallest horizontal distance over the horizon, in meters
+    """
+    px, py, pz = state2[0] - state1[0], state2[1] - state1[1], state2[2] - state1[2]
+    vx, vy, vz = state2[3] - state1[3], state2[4] - state1[4], state2[5] - state1[5]
+    time_to_conflict = None
+    min_separation = inf
+    for step in range(num_steps):
+        future_time = step * time_interval
+        horizontal_distance = sqrt((px + vx * future_time) ** 2 + (py + vy * future_time) ** 2)
+        vertical_distance = abs(pz + vz * future_time)
+        min_separation = min(min_separation, horizontal_distance)
+        if time_to_conflict is None and horizontal_distance < horizontal_separation \
+                and vertical_distance < vertical_separation:
+            time_to_conflict = future_time
+    return time_to_conflict, min_separation
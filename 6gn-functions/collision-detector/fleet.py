@@ -0,0 +1,104 @@
+from array import array
+
+KINEMATIC_FIELDS = ("latitude", "longitude", "altitude", "speed", "direction", "vertical_speed")
+
+
+class AircraftView:
+    """
+    One aircraft of a Fleet, with the read-only dictionary interface the engines use on aircraft dictionaries
+    (aircraft["speed"], aircraft.get("uav_id"), "collision" in aircraft). The only writable key is "collision",
+    which sets the flag of the aircraft in the fleet.
+    """
+    __slots__ = ("fleet", "index")
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+
+    def __getitem__(self, field):
+        column = self.fleet.columns.get(field)
+        if column is not None:
+            return column[self.index]
+        if field == "uav_id":
+            return self.fleet.uav_ids[self.index]
+        if field == "collision" and self.fleet.collisions[self.index]:
+            return True
+        return self.fleet.extras[self.index][field]
+
+    def __setitem__(self, field, value):
+        if field != "collision":
+            raise TypeError(f'Fleet aircraft are read-only, cannot set {field}')
+        self.fleet.collisions[self.index] = bool(value)
+
+    def __contains__(self, field):
+        try:
+            self[field]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+
+class Fleet:
+    """
+    Struct-of-arrays container of the fleet: one array('d') column per kinematic field, the uav_ids,
+    a bytearray of collision flags and the remaining fields of every aircraft (uav_type, ...) kept aside
+    for the output. Built once from the parsed input, consumed by every engine as a sequence of
+    AircraftView, and turned back into dictionaries only by to_records.
+    The columns expose the buffer protocol, so the NumPy engines read them without copying.
+    """
+    __slots__ = ("uav_ids", "columns", "collisions", "extras")
+
+    def __init__(self, uav_ids, columns, collisions, extras):
+        self.uav_ids = uav_ids
+        self.columns = columns
+        self.collisions = collisions
+        self.extras = extras
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Args:
+            records: list of aircraft dictionaries, as in the 'data' of the input
+
+        Returns:
+            Fleet with the same aircraft, in the same order
+        """
+        columns = {field: array('d', (record[field] for record in records)) for field in KINEMATIC_FIELDS}
+        uav_ids = [record.get("uav_id") for record in records]
+        collisions = bytearray(bool(record.get("collision")) for record in records)
+        skipped = set(KINEMATIC_FIELDS) | {"uav_id", "collision"}
+        extras = [{key: value for key, value in record.items() if key not in skipped} for record in records]
+        return cls(uav_ids, columns, collisions, extras)
+
+    def to_records(self):
+        """
+        Output edge: one dictionary per aircraft, with "collision": True on the flagged ones.
+        Kinematic fields come back as floats.
+        """
+        records = []
+        for index, uav_id in enumerate(self.uav_ids):
+            record = {"uav_id": uav_id}
+            record.update(self.extras[index])
+            for field in KINEMATIC_FIELDS:
+                record[field] = self.columns[field][index]
+            if self.collisions[index]:
+                record["collision"] = True
+            records.append(record)
+        return records
+
+    def __len__(self):
+        return len(self.uav_ids)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError('Fleet index out of range')
+        return AircraftView(self, index % len(self))
+
+    def __iter__(self):
+        return (AircraftView(self, index) for index in range(len(self)))
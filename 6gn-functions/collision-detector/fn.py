@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 
-import json
 import typing
 import logging
 
 from call_next_func import post_mutate, post_release
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
-from collision_detector import detect_collisions
+from codec import decode_payload, input_attribute
+from fleet import Fleet
+from detection import find_collisions
 
 # Set up Python logger. milliseconds are not supported by default
 logging.basicConfig(
@@ -22,14 +23,8 @@ for handler in logging.getLogger().handlers:  # Apply the custom formatter to th
 # Initialize the OpenTelemetry tracer
 tracer = TracerInitializer("collision-detector").tracer
 
-# collision-detector.py
-TIME_INTERVAL = 1
-NUM_STEPS = 10
-HORIZONTAL_SEPARATION = 0.20   # 200m
-VERTICAL_SEPARATION   = 300    # metri
 
-
-def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
     """
     input: A JSON string that represents a dictionary with trajectory set 'data' and 'meta' keys.
     output:  calls the mutate function if the collision detected, otherwise based on 'origin' metadata,
@@ -37,15 +32,16 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[collision-detector fn] invoke count: {str(Counter.get_count())}')
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[collision-detector fn] Parsed input: {parsed_input}')
 
             data = parsed_input.get('data', [])
             meta = parsed_input.get('meta', {})
+            fleet = Fleet.from_records(data)  # struct-of-arrays, turned back into dictionaries only for mutate
 
             # Check if 'origin' key exists in meta
             origin = meta.get('origin', None)
@@ -54,11 +50,7 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
                 return 'No origin key found in meta'
 
         # Call collision detector function with the parsed input
-        with tracer.start_as_current_span('find_collisions') as collision_span:
-            collision_exists, flagged_data = detect_collisions(data, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION,
-                                                 VERTICAL_SEPARATION)
-            collision_span.set_attribute("collision", collision_exists)
-            logger.debug(f'[collision-detector fn] Result of collision detection: {collision_exists}')
+        collision_exists, flagged_fleet, conflicts = find_collisions(fleet, meta, tracer)
 
         # Make a decision based on the collision detection result + origin metadata
         # TODO move to to a separate function file
@@ -89,7 +81,7 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
                 logger.info("calling mutate trajectories. (unsafe)")
                 with tracer.start_as_current_span('post_mutate') as post_mutate_span:
                     try:
-                        r = post_mutate(flagged_data, meta, collision_exists)
+                        r = post_mutate(flagged_fleet.to_records(), meta, collision_exists, conflicts)
                         post_mutate_span.set_attribute("response_code", r.status_code)
                     except Exception as e:
                         logger.error(f'[collision-detector  fn] Error in post_mutate: {e}')
@@ -0,0 +1,44 @@
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))  # kept-alive connections, tinyFaaS runs a thread per request
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))  # seconds
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))  # seconds, async calls answer 202 right away
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "1"))  # only before the request is sent, POST is not replayed
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_lock = threading.Lock()
+
+
+def _create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1,  # every call goes to the tinyFaaS gateway
+                          pool_maxsize=HTTP_POOL_SIZE,
+                          max_retries=Retry(total=HTTP_CONNECT_RETRIES, connect=HTTP_CONNECT_RETRIES, read=0,
+                                            status=0, redirect=0, other=0, raise_on_status=False))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """
+    Process-wide requests.Session, created lazily on first use and shared by every invocation of a warm container.
+    Its pool keeps the connections to tinyFaaS alive, so the next hop of the chain does not pay a TCP handshake.
+    The urllib3 pool is thread-safe, concurrent invocations each check out their own connection.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                logger.info(f'[http] creating pooled session (pool size {HTTP_POOL_SIZE}, timeout {HTTP_TIMEOUT})')
+                _session = _create_session()
+    return _session
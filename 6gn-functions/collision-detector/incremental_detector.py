@@ -0,0 +1,97 @@
+import threading
+
+from collision_detector import build_pair_test, conflict_record
+from cpa import fleet_origin
+
+KINEMATIC_FIELDS = ("latitude", "longitude", "altitude", "speed", "direction", "vertical_speed")
+
+
+class ConflictTable:
+    """
+    Pairwise verdicts kept between invocations of a warm container.
+    Only conflicting pairs are stored (as an adjacency map of uav_id -> partner uav_id -> (time_to_conflict,
+    min_separation)), together with the kinematic state every UAV had when its pairs were last evaluated.
+    A verdict stays valid as long as neither of the two states changed.
+    """
+
+    def __init__(self):
+        self.states = {}  # uav_id -> kinematic state the verdicts were computed with
+        self.partners = {}  # uav_id -> {conflicting uav_id: (time_to_conflict, min_separation)}
+        self.settings = None  # detection parameters the verdicts were computed with
+        self.origin = None  # local frame of the projection, fixed for the lifetime of the verdicts
+        self.lock = threading.Lock()  # tinyFaaS serves invocations from a thread per request
+
+    def reset(self, settings):
+        self.states.clear()
+        self.partners.clear()
+        self.settings = settings
+        self.origin = None
+
+    def forget(self, uav_id):
+        self.states.pop(uav_id, None)
+        for partner in self.partners.pop(uav_id, {}):
+            self.partners[partner].pop(uav_id, None)
+
+    def set_verdict(self, uav_id1, uav_id2, time_to_conflict, min_separation):
+        if time_to_conflict is not None:
+            self.partners.setdefault(uav_id1, {})[uav_id2] = (time_to_conflict, min_separation)
+            self.partners.setdefault(uav_id2, {})[uav_id1] = (time_to_conflict, min_separation)
+        else:
+            self.partners.get(uav_id1, {}).pop(uav_id2, None)
+            self.partners.get(uav_id2, {}).pop(uav_id1, None)
+
+
+def detect_collisions_incremental(aircraft_list, time_interval, num_steps, horizontal_separation, vertical_separation,
+                                  table, uav_id=None, conflict_test='sampled', projection='enu'):
+    """
+    Same contract as collision_detector.detect_collisions, but only the pairs touching a changed UAV are evaluated.
+    The reporting UAV (uav_id, carried in meta by update/trigger) is always re-checked against the fleet, as is any
+    UAV whose state differs from the one stored in the table; verdicts between unchanged UAVs are reused.
+    With one UAV reporting per trigger this is O(n) instead of O(n^2).
+    Args:
+        table: ConflictTable kept at module level between invocations
+        uav_id: uav_id of the UAV that triggered the detection, if known
+        (other arguments as in collision_detector.detect_collisions)
+
+    Returns:
+        True if there is a conflict, False otherwise.
+        Modified aircraft_list with "collision": True key-value added to every aircraft involved in a conflict.
+        List of every conflicting pair (see collision_detector.conflict_record), ordered by position in aircraft_list.
+    """
+    n = len(aircraft_list)
+    ids = [aircraft["uav_id"] for aircraft in aircraft_list]
+    if len(set(ids)) != n:
+        raise ValueError('Incremental detection needs one trajectory per uav_id')
+    index_of = {uav: index for index, uav in enumerate(ids)}
+    states = [tuple(aircraft[field] for field in KINEMATIC_FIELDS) for aircraft in aircraft_list]
+
+    with table.lock:
+        settings = (time_interval, num_steps, horizontal_separation, vertical_separation, conflict_test, projection)
+        if table.settings != settings:
+            table.reset(settings)
+        for known in [known for known in table.states if known not in index_of]:
+            table.forget(known)  # left the fleet (older than the trigger's TTL)
+
+        changed = [index for index, uav in enumerate(ids) if table.states.get(uav) != states[index] or uav == uav_id]
+        if changed:
+            if table.origin is None:
+                table.origin = fleet_origin(aircraft_list)
+            pair_conflict, _ = build_pair_test(aircraft_list, time_interval, num_steps, horizontal_separation,
+                                               vertical_separation, conflict_test=conflict_test,
+                                               projection=projection, origin=table.origin)
+
+            changed_set = set(changed)
+            for i in changed:
+                for j in range(n):
+                    if j != i and not (j in changed_set and j < i):  # pairs of two changed UAVs are checked once
+                        table.set_verdict(ids[i], ids[j], *pair_conflict(i, j))
+                table.states[ids[i]] = states[i]
+
+        conflicts = []
+        for i, uav in enumerate(ids):
+            partners = table.partners.get(uav, {})
+            for j in sorted(index_of[partner] for partner in partners if index_of[partner] > i):
+                aircraft_list[i]["collision"] = True  # flag them, in-place
+                aircraft_list[j]["collision"] = True
+                conflicts.append(conflict_record(uav, ids[j], *partners[ids[j]]))
+    return bool(conflicts), aircraft_list, conflicts
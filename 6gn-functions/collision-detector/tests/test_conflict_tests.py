@@ -0,0 +1,83 @@
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from collision_detector import build_pair_test, detect_collisions  # noqa: E402
+
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20  # km
+VERTICAL_SEPARATION = 300  # meters
+METERS_PER_DEGREE = 111195  # along a meridian, or a parallel at the equator
+
+
+def uav(uav_id, east=0.0, north=0.0, altitude=100, speed=0, direction=0, vertical_speed=0):
+    # east and north in meters from (0, 0)
+    return {"uav_id": uav_id, "latitude": north / METERS_PER_DEGREE, "longitude": east / METERS_PER_DEGREE,
+            "altitude": altitude, "speed": speed, "direction": direction, "vertical_speed": vertical_speed}
+
+
+def random_fleet(seed, n=40, spread=2000):
+    rng = random.Random(seed)
+    return [uav(str(index), rng.uniform(0, spread), rng.uniform(0, spread), rng.uniform(50, 500),
+                rng.uniform(0, 120), rng.uniform(0, 360), rng.uniform(-5, 5)) for index in range(n)]
+
+
+def verdict(aircraft_list, conflict_test, projection='enu', time_interval=TIME_INTERVAL, num_steps=NUM_STEPS):
+    pair_conflict, _ = build_pair_test(aircraft_list, time_interval, num_steps, HORIZONTAL_SEPARATION,
+                                       VERTICAL_SEPARATION, conflict_test=conflict_test, projection=projection)
+    return pair_conflict(0, 1)[0] is not None
+
+
+def conflicting_pairs(aircraft_list, **options):
+    _, _, conflicts = detect_collisions([dict(aircraft) for aircraft in aircraft_list], TIME_INTERVAL, NUM_STEPS,
+                                        HORIZONTAL_SEPARATION, VERTICAL_SEPARATION, **options)
+    return {tuple(conflict["uav_ids"]) for conflict in conflicts}
+
+
+class TestCpaAgainstSampled(unittest.TestCase):
+
+    def test_head_on_pair_conflicts_with_both_tests(self):
+        pair = [uav("1", east=0, speed=36, direction=90), uav("2", east=300, speed=36, direction=270)]
+        self.assertTrue(verdict(pair, 'sampled'))
+        self.assertTrue(verdict(pair, 'cpa'))
+
+    def test_vertically_separated_pair_conflicts_with_neither_test(self):
+        pair = [uav("1", east=0, speed=36, direction=90), uav("2", east=300, altitude=600, speed=36, direction=270)]
+        self.assertFalse(verdict(pair, 'sampled'))
+        self.assertFalse(verdict(pair, 'cpa'))
+
+    def test_cpa_catches_a_crossing_between_two_samples(self):
+        # 100 m/s closing speed: 250 m apart at t=0 and again at t=5, closer than 200 m in between
+        pair = [uav("1", east=-125, speed=180, direction=90), uav("2", east=125, speed=180, direction=270)]
+        self.assertFalse(verdict(pair, 'sampled', time_interval=5))
+        self.assertTrue(verdict(pair, 'cpa', time_interval=5))
+
+    def test_every_sampled_conflict_is_a_cpa_conflict(self):
+        # in the ENU frame both tests use the same straight-line motion, CPA also covers the times between samples
+        for seed in range(5):
+            fleet = random_fleet(seed)
+            sampled = conflicting_pairs(fleet, conflict_test='sampled')
+            self.assertTrue(sampled)
+            self.assertLessEqual(sampled, conflicting_pairs(fleet, conflict_test='cpa'))
+
+
+class TestBroadPhase(unittest.TestCase):
+
+    def test_broad_phase_never_drops_a_conflicting_pair(self):
+        for projection in ('enu', 'great_circle'):
+            for conflict_test in ('sampled', 'cpa'):
+                for seed in range(5):
+                    with self.subTest(projection=projection, conflict_test=conflict_test, seed=seed):
+                        fleet = random_fleet(seed)
+                        options = {"conflict_test": conflict_test, "projection": projection}
+                        everything = conflicting_pairs(fleet, **options)
+                        self.assertTrue(everything)
+                        self.assertEqual(conflicting_pairs(fleet, broad_phase=True, **options), everything)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from collision_detector import get_engine  # noqa: E402
+from fleet import Fleet  # noqa: E402
+
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20  # km
+VERTICAL_SEPARATION = 300  # meters
+
+
+def random_fleet(seed, n=30):
+    rng = random.Random(seed)
+    return [{"uav_id": str(index), "uav_type": rng.choice(["1", "2"]), "latitude": rng.uniform(0, 0.02),
+             "longitude": rng.uniform(0, 0.02), "altitude": rng.uniform(50, 500), "speed": rng.uniform(0, 120),
+             "direction": rng.uniform(0, 360), "vertical_speed": rng.uniform(-5, 5)} for index in range(n)]
+
+
+class TestFleet(unittest.TestCase):
+
+    def test_records_round_trip(self):
+        records = random_fleet(0)
+        self.assertEqual(Fleet.from_records(records).to_records(), records)
+
+    def test_aircraft_views_are_read_only_except_collision(self):
+        fleet = Fleet.from_records(random_fleet(1))
+        aircraft = fleet[-1]
+        self.assertEqual(aircraft.get("uav_id"), "29")
+        self.assertNotIn("collision", aircraft)
+        aircraft["collision"] = True
+        self.assertTrue(fleet.to_records()[-1]["collision"])
+        with self.assertRaises(TypeError):
+            aircraft["speed"] = 0
+
+    def test_engines_give_the_same_conflicts_on_a_fleet_and_on_records(self):
+        for name in ('python', 'numpy'):
+            for conflict_test in ('sampled', 'cpa'):
+                with self.subTest(engine=name, conflict_test=conflict_test):
+                    detect = get_engine(name)
+                    records = random_fleet(2)
+                    expected = detect([dict(record) for record in records], TIME_INTERVAL, NUM_STEPS,
+                                      HORIZONTAL_SEPARATION, VERTICAL_SEPARATION, conflict_test=conflict_test)
+                    fleet = Fleet.from_records(records)
+                    collision, _, conflicts = detect(fleet, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION,
+                                                     VERTICAL_SEPARATION, conflict_test=conflict_test)
+                    self.assertTrue(collision)
+                    self.assertEqual(conflicts, expected[2])
+                    self.assertEqual(fleet.to_records(), expected[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
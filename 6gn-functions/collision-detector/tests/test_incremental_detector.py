@@ -0,0 +1,71 @@
+import os
+import sys
+import random
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import incremental_detector  # noqa: E402
+from collision_detector import build_pair_test  # noqa: E402
+from incremental_detector import ConflictTable, detect_collisions_incremental  # noqa: E402
+
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20  # km
+VERTICAL_SEPARATION = 300  # meters
+
+
+def random_fleet(seed, n=30):
+    rng = random.Random(seed)
+    return [{"uav_id": str(index), "latitude": rng.uniform(0, 0.02), "longitude": rng.uniform(0, 0.02),
+             "altitude": rng.uniform(50, 500), "speed": rng.uniform(0, 120), "direction": rng.uniform(0, 360),
+             "vertical_speed": rng.uniform(-5, 5)} for index in range(n)]
+
+
+def detect(fleet, table, uav_id=None):
+    _, _, conflicts = detect_collisions_incremental([dict(aircraft) for aircraft in fleet], TIME_INTERVAL,
+                                                    NUM_STEPS, HORIZONTAL_SEPARATION, VERTICAL_SEPARATION,
+                                                    table, uav_id=uav_id)
+    return {tuple(conflict["uav_ids"]) for conflict in conflicts}
+
+
+def full_detection(fleet, origin):
+    # every pair, in the frame the table keeps
+    pair_conflict, _ = build_pair_test(fleet, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION, VERTICAL_SEPARATION,
+                                       origin=origin)
+    return {(fleet[i]["uav_id"], fleet[j]["uav_id"]) for i in range(len(fleet)) for j in range(i + 1, len(fleet))
+            if pair_conflict(i, j)[0] is not None}
+
+
+class TestConflictTable(unittest.TestCase):
+
+    def test_unchanged_fleet_reuses_the_verdicts(self):
+        fleet, table = random_fleet(0), ConflictTable()
+        first = detect(fleet, table)
+        self.assertTrue(first)
+        with mock.patch.object(incremental_detector, 'build_pair_test',
+                               side_effect=AssertionError('no pair should be evaluated')):
+            self.assertEqual(detect(fleet, table), first)
+
+    def test_changed_uav_matches_a_full_detection(self):
+        fleet, table = random_fleet(1), ConflictTable()
+        detect(fleet, table)
+        for seed, index in enumerate((3, 7, 3)):
+            rng = random.Random(seed)
+            fleet[index] = dict(fleet[index], direction=rng.uniform(0, 360), altitude=rng.uniform(50, 500))
+            self.assertEqual(detect(fleet, table, uav_id=fleet[index]["uav_id"]), full_detection(fleet, table.origin))
+
+    def test_uav_leaving_the_fleet_is_forgotten(self):
+        fleet, table = random_fleet(2), ConflictTable()
+        conflicts = detect(fleet, table)
+        gone = next(iter(conflicts))[0]
+        remaining = [aircraft for aircraft in fleet if aircraft["uav_id"] != gone]
+        self.assertEqual(detect(remaining, table), {pair for pair in conflicts if gone not in pair})
+        self.assertNotIn(gone, table.states)
+        self.assertNotIn(gone, table.partners)
+        self.assertFalse(any(gone in partners for partners in table.partners.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,358 @@
+import numpy as np
+
+from broad_phase import candidate_partners
+from collision_detector import conflict_record
+from fleet import Fleet
+
+R = 6371.0  # Radius of the Earth in kilometers
+R_M = R * 1000  # in meters, for the local east-north-up frame
+
+# upper bound of pairs evaluated at once, keeps memory flat for large fleets
+BLOCK_ELEMENTS = 1 << 20
+
+KINEMATIC_FIELDS = ("latitude", "longitude", "altitude", "speed", "direction", "vertical_speed")
+
+
+def fleet_to_arrays(aircraft_list):
+    """
+    Turn the list of aircraft dictionaries into one float64 array per kinematic field.
+    Args:
+        aircraft_list: list of dictionaries containing the current position and motion parameters of the aircraft,
+            or a fleet.Fleet, whose columns are wrapped without copying
+
+    Returns:
+        dictionary of field name -> numpy array of shape (n,)
+    """
+    if isinstance(aircraft_list, Fleet):
+        return {field: np.frombuffer(aircraft_list.columns[field], dtype=np.float64) for field in KINEMATIC_FIELDS}
+    n = len(aircraft_list)
+    return {field: np.fromiter((aircraft[field] for aircraft in aircraft_list), dtype=np.float64, count=n)
+            for field in KINEMATIC_FIELDS}
+
+
+def predict_future_positions_vectorized(fleet, time_interval, num_steps):
+    """
+    Same model as utility.predict_future_positions, for the whole fleet at once.
+    Args:
+        fleet: dictionary of arrays as returned by fleet_to_arrays
+        time_interval: time interval between each step
+        num_steps: number of steps to predict
+
+    Returns:
+        latitude, longitude and altitude arrays of shape (n, num_steps)
+    """
+    future_time = np.arange(num_steps, dtype=np.float64) * time_interval
+    speed_kms = fleet["speed"] / 3600  # Convert speed from km/h to km/s
+    heading = np.radians(90 - fleet["direction"])
+    latitudes = fleet["latitude"][:, None] + (speed_kms * np.sin(heading))[:, None] * future_time
+    longitudes = fleet["longitude"][:, None] + (speed_kms * np.cos(heading))[:, None] * future_time
+    altitudes = fleet["altitude"][:, None] + fleet["vertical_speed"][:, None] * future_time
+    return latitudes, longitudes, altitudes
+
+
+def local_states_vectorized(fleet, origin=None):
+    """
+    Same frame as cpa.local_state, for the whole fleet at once (origin at the fleet centroid if None).
+
+    Returns:
+        x, y, z, vx, vy, vz arrays of shape (n,)
+    """
+    origin_lat, origin_lon = origin if origin is not None else (fleet["latitude"].mean(), fleet["longitude"].mean())
+    scale_x = R * np.cos(np.radians(origin_lat))
+    speed_kms = fleet["speed"] / 3600  # Convert speed from km/h to km/s
+    heading = np.radians(90 - fleet["direction"])
+    return (scale_x * np.radians(fleet["longitude"] - origin_lon),
+            R * np.radians(fleet["latitude"] - origin_lat),
+            fleet["altitude"],
+            scale_x * np.radians(speed_kms * np.cos(heading)),
+            R * np.radians(speed_kms * np.sin(heading)),
+            fleet["vertical_speed"])
+
+
+def enu_states_vectorized(fleet, origin=None):
+    """
+    Same frame as enu.enu_state, for the whole fleet at once (tangent at the fleet centroid if origin is None).
+
+    Returns:
+        east, north, up, v_east, v_north, v_up arrays of shape (n,), in meters and meters per second
+    """
+    origin_lat, origin_lon = origin if origin is not None else (fleet["latitude"].mean(), fleet["longitude"].mean())
+    origin_lat = np.radians(origin_lat)
+    lat, dlon = np.radians(fleet["latitude"]), np.radians(fleet["longitude"] - origin_lon)
+    speed_ms = fleet["speed"] / 3.6  # Convert speed from km/h to m/s
+    heading = np.radians(fleet["direction"])
+    return (R_M * np.cos(lat) * np.sin(dlon),
+            R_M * (np.cos(origin_lat) * np.sin(lat) - np.sin(origin_lat) * np.cos(lat) * np.cos(dlon)),
+            fleet["altitude"],
+            speed_ms * np.sin(heading),
+            speed_ms * np.cos(heading),
+            fleet["vertical_speed"])
+
+
+def swept_boxes(latitudes, longitudes, altitudes):
+    """
+    Same as broad_phase.swept_box, for every aircraft of the predicted arrays.
+
+    Returns:
+        list of (min_lat, max_lat, min_lon, max_lon, min_alt, max_alt)
+    """
+    columns = []
+    for values in (latitudes, longitudes, altitudes):
+        columns.append(np.minimum(values[:, 0], values[:, -1]).tolist())
+        columns.append(np.maximum(values[:, 0], values[:, -1]).tolist())
+    return list(zip(*columns))
+
+
+def sampled_conflicts(predicted, first, second, time_interval, horizontal_separation, vertical_separation):
+    """
+    Sampled conflict test between aircraft first[k] and second[k] over every predicted step.
+    first and second are index arrays that broadcast together, either two flat lists of pairs
+    or a column of rows against a row of the whole fleet.
+    Args:
+        predicted: (lat_rad, lon_rad, cos_lat, altitudes) arrays of shape (n, num_steps)
+        first, second: broadcastable index arrays
+        time_interval: time interval between each step
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+
+    Returns:
+        (conflicts, time_to_conflict, min_separation) arrays of the broadcast shape, as in
+        collision_detector.conflict_details; time_to_conflict is inf where there is no conflict
+    """
+    lat_rad, lon_rad, cos_lat, altitudes = predicted
+    shape = np.broadcast_shapes(first.shape, second.shape)
+    conflicts = np.zeros(shape, dtype=bool)
+    time_to_conflict = np.full(shape, np.inf)
+    min_separation = np.full(shape, np.inf)
+    for step in range(lat_rad.shape[1]):
+        dlat = lat_rad[second, step] - lat_rad[first, step]
+        dlon = lon_rad[second, step] - lon_rad[first, step]
+        a = np.sin(dlat / 2) ** 2 + cos_lat[first, step] * cos_lat[second, step] * np.sin(dlon / 2) ** 2
+        horizontal_distance = 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        vertical_distance = np.abs(altitudes[second, step] - altitudes[first, step])
+        np.minimum(min_separation, horizontal_distance, out=min_separation)
+        conflict_now = (horizontal_distance < horizontal_separation) & (vertical_distance < vertical_separation)
+        time_to_conflict[conflict_now & ~conflicts] = step * time_interval
+        conflicts |= conflict_now
+    return conflicts, time_to_conflict, min_separation
+
+
+def enu_sampled_conflicts(states, first, second, time_interval, num_steps, horizontal_separation,
+                          vertical_separation):
+    """
+    Vectorized enu.enu_conflict_details for broadcastable index arrays first and second.
+    Positions along the horizon are linear in time, so no per-step prediction array is built.
+
+    Returns:
+        (conflicts, time_to_conflict, min_separation) arrays of the broadcast shape, distances in meters;
+        time_to_conflict is inf where there is no conflict
+    """
+    x, y, z, vx, vy, vz = states
+    px, py, pz = x[second] - x[first], y[second] - y[first], z[second] - z[first]
+    rvx, rvy, rvz = vx[second] - vx[first], vy[second] - vy[first], vz[second] - vz[first]
+    conflicts = np.zeros(px.shape, dtype=bool)
+    time_to_conflict = np.full(px.shape, np.inf)
+    min_separation = np.full(px.shape, np.inf)
+    for step in range(num_steps):
+        future_time = step * time_interval
+        horizontal_distance = np.hypot(px + rvx * future_time, py + rvy * future_time)
+        vertical_distance = np.abs(pz + rvz * future_time)
+        np.minimum(min_separation, horizontal_distance, out=min_separation)
+        conflict_now = (horizontal_distance < horizontal_separation) & (vertical_distance < vertical_separation)
+        time_to_conflict[conflict_now & ~conflicts] = future_time
+        conflicts |= conflict_now
+    return conflicts, time_to_conflict, min_separation
+
+
+def cpa_conflicts(states, first, second, horizon, horizontal_separation, vertical_separation):
+    """
+    Vectorized cpa.closest_point_of_approach for broadcastable index arrays first and second.
+
+    Returns:
+        (conflicts, time_to_conflict, distance_at_cpa) arrays of the broadcast shape;
+        time_to_conflict is inf where there is no conflict
+    """
+    x, y, z, vx, vy, vz = states
+    px, py, pz = x[second] - x[first], y[second] - y[first], z[second] - z[first]
+    rvx, rvy, rvz = vx[second] - vx[first], vy[second] - vy[first], vz[second] - vz[first]
+
+    a = rvx * rvx + rvy * rvy
+    b = 2 * (px * rvx + py * rvy)
+    c = px * px + py * py - horizontal_separation ** 2
+    moving = a > 0
+    safe_a = np.where(moving, a, 1)
+    discriminant = b * b - 4 * a * c
+    root = np.sqrt(np.maximum(discriminant, 0))
+    crossing = moving & (discriminant > 0)
+    inside = ~moving & (c < 0)  # same horizontal velocity, the distance never changes
+    horizontal_start = np.where(crossing, (-b - root) / (2 * safe_a), np.where(inside, -np.inf, np.inf))
+    horizontal_end = np.where(crossing, (-b + root) / (2 * safe_a), np.where(inside, np.inf, -np.inf))
+
+    climbing = rvz != 0
+    safe_vz = np.where(climbing, rvz, 1)
+    bound1, bound2 = (-vertical_separation - pz) / safe_vz, (vertical_separation - pz) / safe_vz
+    level = np.abs(pz) < vertical_separation
+    vertical_start = np.where(climbing, np.minimum(bound1, bound2), np.where(level, -np.inf, np.inf))
+    vertical_end = np.where(climbing, np.maximum(bound1, bound2), np.where(level, np.inf, -np.inf))
+
+    start = np.maximum(np.maximum(horizontal_start, vertical_start), 0)
+    end = np.minimum(np.minimum(horizontal_end, vertical_end), horizon)
+    conflicts = start <= end
+
+    time_of_cpa = np.where(moving, np.clip(-b / (2 * safe_a), 0, horizon), 0)
+    distance_at_cpa = np.hypot(px + rvx * time_of_cpa, py + rvy * time_of_cpa)
+    return conflicts, np.where(conflicts, start, np.inf), distance_at_cpa
+
+
+def build_conflict_test(fleet, time_interval, num_steps, horizontal_separation, vertical_separation, conflict_test,
+                        projection='enu', origin=None):
+    """
+    Prepare the fleet for one conflict test, like collision_detector.build_pair_test.
+    Args:
+        fleet: dictionary of arrays as returned by fleet_to_arrays
+        conflict_test: 'sampled' or 'cpa', see collision_detector.detect_collisions
+        projection: 'enu' or 'great_circle', see collision_detector.detect_collisions
+        origin: (latitude, longitude) of the local frame, the fleet centroid if None
+
+    Returns:
+        (in_conflict, swept) where in_conflict(first, second) evaluates broadcastable index arrays into
+        (conflicts, time_to_conflict, min_separation in km), and swept() returns the (boxes, margins)
+        to pass to broad_phase.candidate_partners
+    """
+    horizon = (num_steps - 1) * time_interval
+    if projection == 'enu':
+        states = enu_states_vectorized(fleet, origin)
+        horizontal_separation_m = horizontal_separation * 1000  # the local frame is in meters
+        if conflict_test == 'sampled':
+            def in_conflict(first, second):
+                conflicts, time_to_conflict, min_separation = enu_sampled_conflicts(
+                    states, first, second, time_interval, num_steps, horizontal_separation_m, vertical_separation)
+                return conflicts, time_to_conflict, min_separation / 1000
+        elif conflict_test == 'cpa':
+            def in_conflict(first, second):
+                conflicts, time_to_conflict, distance_at_cpa = cpa_conflicts(
+                    states, first, second, horizon, horizontal_separation_m, vertical_separation)
+                return conflicts, time_to_conflict, distance_at_cpa / 1000
+        else:
+            raise ValueError(f'Unknown conflict test: {conflict_test}')
+
+        def swept():
+            ends = [np.stack((values, values + rates * horizon), axis=1) for values, rates in zip(states[:3], states[3:])]
+            return swept_boxes(*ends), (horizontal_separation_m, horizontal_separation_m, vertical_separation)
+        return in_conflict, swept
+
+    elif projection != 'great_circle':
+        raise ValueError(f'Unknown projection: {projection}')
+
+    if conflict_test == 'sampled':
+        latitudes, longitudes, altitudes = predict_future_positions_vectorized(fleet, time_interval, num_steps)
+        lat_rad = np.radians(latitudes)
+        predicted = lat_rad, np.radians(longitudes), np.cos(lat_rad), altitudes
+
+        def in_conflict(first, second):
+            return sampled_conflicts(predicted, first, second, time_interval, horizontal_separation,
+                                     vertical_separation)
+
+        def swept():
+            return swept_boxes(latitudes, longitudes, altitudes), None
+        return in_conflict, swept
+    elif conflict_test == 'cpa':
+        states = local_states_vectorized(fleet, origin)
+
+        def in_conflict(first, second):
+            return cpa_conflicts(states, first, second, horizon, horizontal_separation, vertical_separation)
+
+        def swept():
+            # the broad phase only needs the first and last positions of the horizon
+            return swept_boxes(*predict_future_positions_vectorized(fleet, horizon, 2)), None
+        return in_conflict, swept
+    raise ValueError(f'Unknown conflict test: {conflict_test}')
+
+
+def pair_list_conflicts(in_conflict, first, second):
+    """
+    Evaluate an explicit list of pairs in blocks of BLOCK_ELEMENTS.
+
+    Returns:
+        (first, second, time_to_conflict, min_separation) arrays of the conflicting pairs only
+    """
+    found = []
+    for start in range(0, first.shape[0], BLOCK_ELEMENTS):
+        block = slice(start, start + BLOCK_ELEMENTS)
+        conflicts, time_to_conflict, min_separation = in_conflict(first[block], second[block])
+        found.append((first[block][conflicts], second[block][conflicts], time_to_conflict[conflicts],
+                      min_separation[conflicts]))
+    return merge_conflicts(found)
+
+
+def dense_conflicts(in_conflict, start, stop, n):
+    """
+    Evaluate rows start..stop-1 against the whole fleet, in row blocks of about BLOCK_ELEMENTS pairs.
+
+    Returns:
+        (first, second, time_to_conflict, min_separation) arrays of the conflicting pairs i < j,
+        ordered by (i, j)
+    """
+    found = []
+    block_rows = max(1, BLOCK_ELEMENTS // n)
+    columns = np.arange(n)[None, :]
+    for block_start in range(start, stop, block_rows):
+        rows = np.arange(block_start, min(block_start + block_rows, stop))[:, None]
+        conflicts, time_to_conflict, min_separation = in_conflict(rows, columns)
+        conflicts &= columns > rows  # keep i < j only
+        first, second = np.nonzero(conflicts)
+        found.append((first + block_start, second, time_to_conflict[first, second], min_separation[first, second]))
+    return merge_conflicts(found)
+
+
+def merge_conflicts(found):
+    """
+    Concatenate the per-block (first, second, time_to_conflict, min_separation) arrays, keeping their order.
+    """
+    if not found:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0), np.zeros(0)
+    return tuple(np.concatenate([block[column] for block in found]) for column in range(4))
+
+
+def apply_conflicts(aircraft_list, first, second, time_to_conflict, min_separation):
+    """
+    Flag every aircraft involved in a conflict and build the conflict list of collision_detector.detect_collisions.
+
+    Returns:
+        (collision, aircraft_list, conflicts)
+    """
+    for index in np.union1d(first, second):
+        aircraft_list[index]["collision"] = True  # flag them, in-place
+    conflicts = [conflict_record(aircraft_list[i].get("uav_id"), aircraft_list[j].get("uav_id"), time, separation)
+                 for i, j, time, separation in zip(first.tolist(), second.tolist(), time_to_conflict.tolist(),
+                                                   min_separation.tolist())]
+    return bool(conflicts), aircraft_list, conflicts
+
+
+def detect_collisions_vectorized(aircraft_list, time_interval, num_steps, horizontal_separation, vertical_separation,
+                                 broad_phase=False, conflict_test='sampled', projection='enu'):
+    """
+    Drop-in replacement of collision_detector.detect_collisions built on broadcast NumPy operations.
+    The fleet is evaluated in row blocks so that memory stays bounded by BLOCK_ELEMENTS pairs at once.
+    With broad_phase, only the candidate pairs of broad_phase.candidate_partners are gathered and evaluated.
+
+    Returns:
+        True if there is a conflict, False otherwise.
+        Modified aircraft_list with "collision": True key-value added to every aircraft involved in a conflict.
+        List of every conflicting pair (see collision_detector.conflict_record), ordered by position in aircraft_list.
+    """
+    n = len(aircraft_list)
+    if n < 2:
+        return False, aircraft_list, []
+
+    in_conflict, swept = build_conflict_test(fleet_to_arrays(aircraft_list), time_interval, num_steps,
+                                             horizontal_separation, vertical_separation, conflict_test, projection)
+    if broad_phase:
+        boxes, margins = swept()
+        partners = candidate_partners(boxes, horizontal_separation, vertical_separation, margins=margins)
+        first = np.fromiter((i for i, partner_list in enumerate(partners) for _ in partner_list), dtype=np.intp)
+        second = np.fromiter((j for partner_list in partners for j in partner_list), dtype=np.intp)
+        found = pair_list_conflicts(in_conflict, first, second)
+    else:
+        found = dense_conflicts(in_conflict, 0, n - 1, n)
+    return apply_conflicts(aircraft_list, *found)
@@ -1,6 +1,8 @@
-import requests
 import logging
 
+from http_session import get_session, HTTP_TIMEOUT
+from codec import encode_payload
+
 host = "172.17.0.1"
 # host = "host.docker.internal"
 
@@ -12,7 +14,6 @@ logger = logging.getLogger(__name__)
 def post_collision_detector(data, meta):
     url = f"http://{host}:8000/collisiondetector"
     headers = {
-        "Content-Type": "application/json",
         "X-tinyFaaS-Async": "true"}  # tinyfaas will return a 202 response
 
     payload = {
@@ -20,9 +21,26 @@ def post_collision_detector(data, meta):
         "meta": meta
     }
     logger.debug(f'[mutate fn] calling collisiondetector function on {url} with payload: {payload}')
-    response = requests.post(url, headers=headers, json=payload)
+    headers['Content-Type'], body = encode_payload(payload)  # msgpack or JSON, see codec.py
+    response = get_session().post(url, headers=headers, data=body, timeout=HTTP_TIMEOUT)
     if response.status_code != 202:  # async call
         logger.error(f'[mutate fn] Error calling collisiondetector function ({response.status_code}): {response.text}')
     else:
         logger.info(f'[mutate fn] ({response.status_code}) Response from collisiondetector function: {response.text}')
     return response
+
+
+def post_release(input):
+    url = f"http://{host}:8000/release"
+    headers = {
+        "X-tinyFaaS-Async": "true"}  # tinyfaas will return a 202 response
+
+    payload = input
+    logger.debug(f'[mutate fn] calling release function on {url} with payload: {payload}')
+    headers['Content-Type'], body = encode_payload(payload)  # msgpack or JSON, see codec.py
+    response = get_session().post(url, headers=headers, data=body, timeout=HTTP_TIMEOUT)
+    if response.status_code != 202:  # async call
+        logger.error(f'[mutate fn] Error calling release function ({response.status_code}): {response.text}')
+    else:
+        logger.info(f'[mutate fn] ({response.status_code}) Response from release function: {response.text}')
+    return response
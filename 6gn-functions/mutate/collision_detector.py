@@ -0,0 +1,220 @@
+from math import inf
+
+from utility import haversine, predict_future_positions
+from broad_phase import swept_box, candidate_partners
+from cpa import fleet_origin, local_state, closest_point_of_approach
+from enu import enu_state, enu_swept_box, enu_conflict_details
+
+
+# Calculate the haversine distance between two points on the Earth's surface given their latitude and longitude.
+def check_for_conflict(positions1, positions2, horizontal_separation, vertical_separation):
+    """
+    For each pair of aircraft, compare their predicted positions to check if they are within a critical distance (horizontal and vertical) at any time step.
+    Args:
+        positions1: list of future positions of the first aircraft
+        positions2: list of future positions of the second aircraft
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+
+    Returns:
+        Boolean: True if conflict is detected, False otherwise.
+    """
+    for pos1, pos2 in zip(positions1, positions2):
+        horizontal_distance = haversine(pos1["latitude"], pos1["longitude"], pos2["latitude"], pos2["longitude"])
+        vertical_distance = abs(pos1["altitude"] - pos2["altitude"])
+        if horizontal_distance < horizontal_separation and vertical_distance < vertical_separation:
+            return True
+    return False
+
+
+def conflict_details(positions1, positions2, time_interval, horizontal_separation, vertical_separation):
+    """
+    Like check_for_conflict, but walks the whole horizon to also report when and how close the pair gets.
+    Args:
+        positions1: list of future positions of the first aircraft
+        positions2: list of future positions of the second aircraft
+        time_interval: time interval between each step
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+
+    Returns:
+        (time_to_conflict, min_separation): time of the first conflicting step (None if there is no conflict)
+        and the smallest horizontal distance over the horizon
+    """
+    time_to_conflict = None
+    min_separation = inf
+    for step, (pos1, pos2) in enumerate(zip(positions1, positions2)):
+        horizontal_distance = haversine(pos1["latitude"], pos1["longitude"], pos2["latitude"], pos2["longitude"])
+        vertical_distance = abs(pos1["altitude"] - pos2["altitude"])
+        min_separation = min(min_separation, horizontal_distance)
+        if time_to_conflict is None and horizontal_distance < horizontal_separation \
+                and vertical_distance < vertical_separation:
+            time_to_conflict = step * time_interval
+    return time_to_conflict, min_separation
+
+
+def conflict_record(uav_id1, uav_id2, time_to_conflict, min_separation):
+    """
+    One edge of the conflict graph, as it travels in the payload to the downstream functions.
+    time_to_conflict is in seconds, min_separation in the unit of the horizontal separation (km).
+    """
+    return {"uav_ids": [uav_id1, uav_id2], "time_to_conflict": float(time_to_conflict),
+            "min_separation": float(min_separation)}
+
+
+# resolves conflict between two aircrafts
+# def resolve_conflict(aircraft1, aircraft2):
+#     """
+#     If a conflict is detected, initiate conflict resolution measures, such as changing altitude, direction, or speed.
+#     """
+#     # TODO Implement conflict resolution strategy, e.g., change altitude or direction
+#     #  This is mutate function's responsibility
+#     pass
+
+
+# Projection stage and pair test shared by the pairwise engines
+def build_pair_test(aircraft_list, time_interval, num_steps, horizontal_separation, vertical_separation,
+                    conflict_test='sampled', projection='enu', origin=None):
+    """
+    Prepare the fleet once for the pairwise conflict test.
+    Args:
+        aircraft_list: list of dictionaries containing the current position and motion parameters of the aircraft
+        conflict_test: 'sampled' or 'cpa', see detect_collisions
+        projection: 'enu' or 'great_circle', see detect_collisions
+        origin: (latitude, longitude) of the local frame, the fleet centroid if None
+        (other arguments as in detect_collisions)
+
+    Returns:
+        (pair_conflict, swept) where pair_conflict(i, j) returns (time_to_conflict or None, min_separation in km)
+        and swept() returns the (boxes, margins) to pass to broad_phase.candidate_partners
+    """
+    horizon = (num_steps - 1) * time_interval
+    if projection == 'enu':
+        if origin is None:
+            origin = fleet_origin(aircraft_list)
+        states = [enu_state(aircraft, origin) for aircraft in aircraft_list]
+        horizontal_separation_m = horizontal_separation * 1000  # the local frame is in meters
+
+        if conflict_test == 'sampled':
+            def pair_conflict(i, j):
+                time_to_conflict, min_separation = enu_conflict_details(states[i], states[j], time_interval,
+                                                                        num_steps, horizontal_separation_m,
+                                                                        vertical_separation)
+                return time_to_conflict, min_separation / 1000
+        elif conflict_test == 'cpa':
+            def pair_conflict(i, j):
+                time_to_conflict, _, distance_at_cpa = closest_point_of_approach(states[i], states[j], horizon,
+                                                                                 horizontal_separation_m,
+                                                                                 vertical_separation)
+                return time_to_conflict, distance_at_cpa / 1000
+        else:
+            raise ValueError(f'Unknown conflict test: {conflict_test}')
+
+        def swept():
+            margins = (horizontal_separation_m, horizontal_separation_m, vertical_separation)
+            return [enu_swept_box(state, horizon) for state in states], margins
+        return pair_conflict, swept
+
+    elif projection != 'great_circle':
+        raise ValueError(f'Unknown projection: {projection}')
+
+    if conflict_test == 'sampled':
+        # predict every trajectory once, not once per pair
+        predictions = [predict_future_positions(aircraft, time_interval, num_steps) for aircraft in aircraft_list]
+
+        def pair_conflict(i, j):
+            return conflict_details(predictions[i], predictions[j], time_interval, horizontal_separation,
+                                    vertical_separation)
+
+        def swept():
+            return [swept_box(positions) for positions in predictions], None
+    elif conflict_test == 'cpa':
+        if origin is None:
+            origin = fleet_origin(aircraft_list)
+        states = [local_state(aircraft, origin) for aircraft in aircraft_list]
+
+        def pair_conflict(i, j):
+            time_to_conflict, _, distance_at_cpa = closest_point_of_approach(states[i], states[j], horizon,
+                                                                             horizontal_separation,
+                                                                             vertical_separation)
+            return time_to_conflict, distance_at_cpa
+
+        def swept():
+            # the broad phase only needs the first and last positions of the horizon
+            return [swept_box(predict_future_positions(aircraft, horizon, 2)) for aircraft in aircraft_list], None
+    else:
+        raise ValueError(f'Unknown conflict test: {conflict_test}')
+    return pair_conflict, swept
+
+
+# Main algorithm
+# Iterates over all aircraft pairs, and records every pair in conflict.
+def detect_collisions(aircraft_list, time_interval, num_steps, horizontal_separation, vertical_separation,
+                      broad_phase=False, conflict_test='sampled', projection='enu'):
+    """
+    Detect potential conflicts between pairs of aircraft in the aircraft_list.
+    Args:
+        aircraft_list: list of dictionaries containing the current position and motion parameters of the aircraft,
+            or the same fleet as a fleet.Fleet
+        time_interval: time interval between each step
+        num_steps: number of steps to predict
+        horizontal_separation: critical horizontal distance for conflict detection
+        vertical_separation: critical vertical distance for conflict detection
+        broad_phase: if True, only the pairs returned by broad_phase.candidate_partners are checked
+        conflict_test: 'sampled' to compare the num_steps predicted positions, 'cpa' for the closed-form
+            closest-point-of-approach test over the same horizon (see cpa.py)
+        projection: 'enu' to project the fleet once into a local east-north-up frame in meters (see enu.py),
+            'great_circle' for the original latitude/longitude prediction with haversine distances
+
+    Returns:
+        True if there is a conflict, False otherwise.
+        Modified aircraft_list with "collision": True key-value added to every aircraft involved in a conflict.
+        List of every conflicting pair (see conflict_record), ordered by position in aircraft_list.
+
+    """
+    collision = False
+    conflicts = []
+    n = len(aircraft_list)
+    if n < 2:
+        return collision, aircraft_list, conflicts
+
+    pair_conflict, swept = build_pair_test(aircraft_list, time_interval, num_steps, horizontal_separation,
+                                           vertical_separation, conflict_test=conflict_test, projection=projection)
+    if broad_phase:
+        boxes, margins = swept()
+        partners = candidate_partners(boxes, horizontal_separation, vertical_separation, margins=margins)
+    else:
+        partners = [range(i + 1, n) for i in range(n)]
+    for i, aircraft1 in enumerate(aircraft_list):
+        for j in partners[i]:
+            aircraft2 = aircraft_list[j]
+            time_to_conflict, min_separation = pair_conflict(i, j)
+            if time_to_conflict is not None:
+                collision = True
+                aircraft1["collision"] = True  # flag them, in-place
+                aircraft2["collision"] = True
+                conflicts.append(conflict_record(aircraft1.get("uav_id"), aircraft2.get("uav_id"), time_to_conflict,
+                                                 min_separation))
+#                 resolve_conflict(aircraft1, aircraft2)
+    return collision, aircraft_list, conflicts
+
+
+# Engine selection, so fn.py can switch between implementations with the same call signature
+def get_engine(name):
+    """
+    Args:
+        name: 'python' for the pairwise loop above, 'numpy' for the vectorized engine,
+            'parallel' for the vectorized engine sharded over a process pool
+
+    Returns:
+        a detect_collisions compatible function
+    """
+    if name == 'python':
+        return detect_collisions
+    elif name == 'numpy':
+        from vectorized_detector import detect_collisions_vectorized  # numpy is only needed by this engine
+        return detect_collisions_vectorized
+    elif name == 'parallel':
+        from parallel_detector import detect_collisions_parallel
+        return detect_collisions_parallel
+    raise ValueError(f'Unknown collision engine: {name}')
@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 
+import os
 import json
 import typing
 import logging
 
-from call_next_func import post_collision_detector
+from call_next_func import post_collision_detector, post_release
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
-from mutate import dec_speed_of_lower_collider, change_dir_of_lower_collider
+from codec import decode_payload, input_attribute
+from mutation_step import mutate_step
+from resolution import resolve_locally
 
 # Set up Python logger. milliseconds are not supported by default
 logging.basicConfig(
@@ -27,98 +30,53 @@ with open('abilities.json', 'r') as f:
     abilities = json.load(f)
 logger.debug(f'[mutate fn] Abilities: {abilities}')
 
-MAX_MUTATIONS = 100  # TODO: get from ENV
-
-TIME_INTERVAL = 1
-NUM_STEPS = 10
-HORIZONTAL_SEPARATION = 0.20   # 50 m (prima era 1.0 = 1 km)
-VERTICAL_SEPARATION   = 300    # metri
+# escalate through the mutation cases in-process and call release once conflict-free, see resolution.py
+LOCAL_RESOLUTION = os.getenv("LOCAL_RESOLUTION", "false").lower() == "true"
 
 # FIXME: the output's 'direction' and 'speed' values can be long floats. make them int afterward?
-def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
     """
     input: A JSON string that represents a dictionary with a trajectory set 'data' and 'meta' keys.
     output: calls the magic selector function with a collection of mutated trajectories set (candidates)
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[mutate fn] invoke count: {str(Counter.get_count())}')
 
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[mutate fn] Parsed input: {parsed_input}')
 
             data = parsed_input.get('data', [])
             meta = parsed_input.get('meta', {})
 
-        # TODO: merge MAX_MUTATIONS check with "mutation cases"?
-        # (check &) increment the number of mutations (guard clauses)
-        with tracer.start_as_current_span('process_mutate_count', attributes={"origin": meta.get('origin'),
-                                                                              "mutations": meta.get('mutations',
-                                                                                                    None)}) as process_mutate_count_span:
-            if 'mutations' in meta and meta['origin'] == 'system':  # previously mutated
-                logger.info(f"[mutate fn] the trajectory was mutated {meta['mutations']} time(s).")
-                if meta['mutations'] > MAX_MUTATIONS:
-                    logger.warning(
-                        f"[mutate fn] the trajectory has been mutated more than {MAX_MUTATIONS} times. Aborting the request.")
-                    return f"Trajectory mutated more than {MAX_MUTATIONS} times. Aborting."
-                meta['mutations'] += 1
-            elif 'mutations' not in meta and meta['origin'] == 'self_report':  # first time being mutated
-                logger.info("[mutate fn] first time mutating the trajectory.")
-                meta['mutations'] = 1
-            else:
-                msg = f"[mutate fn] fatal! unexpected origin or mutations value. origin: {meta['origin']}"
-                process_mutate_count_span.set_attribute("error", True)
-                logger.fatal(msg)
-                return msg  # guard clause
-
-        # apply mutation cases
-        with tracer.start_as_current_span('mutation') as mutation_cases_span:
-            mutation_cases_str = meta.get('mutation_cases', '000')  # replace with bin 000 if None
-            logger.info(f"[mutate fn] mutation_cases: {mutation_cases_str}")
-            mutation_cases = int(mutation_cases_str, 2)  # parse as binary
-
-            if mutation_cases == 0:
-                with tracer.start_as_current_span('case1_mutation') as case1_span:
-                    success, mutated_trajectory_set = dec_speed_of_lower_collider(data, abilities)  # Case 1
-                    if not success:
-                        case1_span.set_attribute("error", True)
-                        case1_span.set_attribute("error_details", mutated_trajectory_set)
-                        return json.dumps(
-                            {"error": mutated_trajectory_set})  # mutated_trajectory_set is just a string message here
-                    updated_mutation_cases = mutation_cases | 0b001  # set the first bit to 1
-            elif mutation_cases == 0b001:  # mutation_cases & 0b011 == 1
-                with tracer.start_as_current_span('case2_mutation') as case2_span:
-                    success, mutated_trajectory_set = change_dir_of_lower_collider(data, abilities)
-                    if not success:
-                        case2_span.set_attribute("error", True)
-                        case2_span.set_attribute("error_details", mutated_trajectory_set)
-                        return json.dumps(
-                            {"error": mutated_trajectory_set})  # mutated_trajectory_set is just a string message here
-                    updated_mutation_cases = mutation_cases | 0b010  # set the second bit to 1
-            # mutate.py – dopo i casi 1 e 2
-            elif mutation_cases == 0b011:
-                lowest = max([t for t in data if t.get('collision')], key=lambda t: t['uav_id'])
-                original_alt = lowest['altitude']
-                lowest['altitude'] = original_alt + (VERTICAL_SEPARATION + 10)
-                lowest['origin'] = 'mutate'
-                lowest['mutation_cases'] = '111'
-                updated_mutation_cases = 0b111
-                mutated_trajectory_set = data
-
-            else:
-                # All known mutations already applied (bits 1 & 2). Do NOT stop here.
-                # Just carry current data forward so collision-detector can re-check and, if safe, call release.
-                logger.info(f"[mutate fn] all mutation cases applied (mutation_cases={mutation_cases_str}); re-checking collisions.")
-                mutated_trajectory_set = data
-                updated_mutation_cases = mutation_cases  # keep the bits as-is
+        if LOCAL_RESOLUTION:
+            mutated_trajectory_set, resolved, abort_message = resolve_locally(data, meta, parsed_input.get('conflicts'),
+                                                                              abilities, tracer)
+            if abort_message is not None:
+                return abort_message
+            if resolved:  # what collision-detector would do with a safe set from system
+                with tracer.start_as_current_span('post_release') as post_release_span:
+                    try:
+                        r = post_release({"data": mutated_trajectory_set, "meta": meta})
+                        post_release_span.set_attribute("response_code", r.status_code)
+                    except Exception as e:
+                        logger.error(f'[mutate fn] Error in post_release: {e}')
+                        post_release_span.set_attribute("error", True)
+                        post_release_span.set_attribute("error_details", e)
+                return str({"data": mutated_trajectory_set})
+            # every case applied and still in conflict: back to the collision-detector loop
+        else:
+            # count the mutation and apply the next mutation case (updates meta for the re-check)
+            mutated_trajectory_set, abort_message = mutate_step(data, meta, abilities, tracer,
+                                                                 parsed_input.get('conflicts'))
+            if abort_message is not None:
+                return abort_message
 
         # call next function with the selected
         with tracer.start_as_current_span('post_collision_detector') as post_collision_detector_span:
-            meta['origin'] = "system"  # change origin of the data if it is 'self_report'
-            meta['mutation_cases'] = f'{updated_mutation_cases:03b}'  # convert back to binary string
             try:
                 r = post_collision_detector(mutated_trajectory_set, meta)
                 post_collision_detector_span.set_attribute("response_code", r.status_code)
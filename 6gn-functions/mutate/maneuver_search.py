@@ -0,0 +1,174 @@
+import os
+import logging
+
+import numpy as np
+
+from cpa import fleet_origin
+from broad_phase import separation_margins
+from vectorized_detector import KINEMATIC_FIELDS, fleet_to_arrays, build_conflict_test
+from mutate import lower_colliders, priority_rank
+
+logger = logging.getLogger(__name__)
+
+# candidate grid, every combination of the three is scored
+MANEUVER_SPEED_SCALES = [float(scale) for scale in
+                         os.getenv("MANEUVER_SPEED_SCALES", "1.0,0.9,0.75,0.6,0.5,1.1,1.25").split(",")]
+MANEUVER_BEARING_STEP = float(os.getenv("MANEUVER_BEARING_STEP", "5"))  # degrees, up to the max_bearing of the UAV
+MANEUVER_ALTITUDE_STEP = float(os.getenv("MANEUVER_ALTITUDE_STEP", "50"))  # meters
+MANEUVER_MAX_ALTITUDE_OFFSET = float(os.getenv("MANEUVER_MAX_ALTITUDE_OFFSET", "400"))  # meters, up or down
+MANEUVER_MIN_ALTITUDE = float(os.getenv("MANEUVER_MIN_ALTITUDE", "10"))  # meters, lower candidates are dropped
+
+DEFAULT_MAX_BEARING = 15.0  # degrees, for a uav_type without max_bearing (as change_dir_of_lower_collider)
+
+
+def candidate_grid(trajectory, abilities):
+    """
+    Every maneuver the UAV can fly: speed scales within [min_speed, max_speed] of its uav_type, bearing deltas
+    within its max_bearing, altitude offsets within MANEUVER_MAX_ALTITUDE_OFFSET. The unchanged trajectory is
+    always a candidate.
+
+    Returns:
+        (speed_scale, bearing_delta, altitude_offset, deviation) arrays of shape (candidates,), deviation is the
+        normalized size of the maneuver (0 for the unchanged trajectory)
+    """
+    ability = abilities.get(trajectory.get('uav_type'), {})
+    speed = trajectory['speed']
+    min_speed, max_speed = float(ability.get('min_speed', 0)), float(ability.get('max_speed', 'inf'))
+    scales = np.array(sorted({scale for scale in MANEUVER_SPEED_SCALES if min_speed <= speed * scale <= max_speed}
+                             | {1.0}))
+
+    max_bearing = float(ability.get('max_bearing', 0)) or DEFAULT_MAX_BEARING
+    steps = int(max_bearing // MANEUVER_BEARING_STEP)
+    bearings = np.arange(-steps, steps + 1) * MANEUVER_BEARING_STEP
+
+    steps = int(MANEUVER_MAX_ALTITUDE_OFFSET // MANEUVER_ALTITUDE_STEP)
+    offsets = np.arange(-steps, steps + 1) * MANEUVER_ALTITUDE_STEP
+    offsets = offsets[trajectory['altitude'] + offsets >= min(MANEUVER_MIN_ALTITUDE, trajectory['altitude'])]
+
+    scale, bearing, offset = (axis.ravel() for axis in np.meshgrid(scales, bearings, offsets, indexing='ij'))
+    speed_range = (max_speed - min_speed) if np.isfinite(max_speed) and max_speed > min_speed else speed or 1.0
+    deviation = (np.abs(scale - 1) * speed / speed_range
+                 + np.abs(bearing) / max_bearing
+                 + np.abs(offset) / MANEUVER_MAX_ALTITUDE_OFFSET)
+    return scale, bearing, offset, deviation
+
+
+def score_candidates(fleet, index, grid, origin, time_interval, num_steps, horizontal_separation,
+                     vertical_separation, conflict_test, projection):
+    """
+    Conflict test of every candidate of the UAV at index against every other UAV of the fleet, in one batch.
+    The candidates are appended to the fleet as extra rows and evaluated with the detector's own test
+    (vectorized_detector.build_conflict_test, same conflict_test, projection and frame origin), so a candidate
+    scored conflict-free is also conflict-free for collision-detector.
+    Only the UAVs whose swept box comes within the separation minima of the candidates' swept boxes are tested.
+
+    Args:
+        fleet: dictionary of arrays as returned by vectorized_detector.fleet_to_arrays
+        origin: (latitude, longitude) of the detector's local frame, see cpa.fleet_origin
+        (other arguments as in collision_detector.detect_collisions)
+
+    Returns:
+        number of UAVs each candidate conflicts with, shape (candidates,)
+    """
+    scale, bearing, offset, _ = grid
+    n, count = len(fleet['latitude']), len(scale)
+    rows = {field: np.concatenate((fleet[field], np.full(count, fleet[field][index]))) for field in KINEMATIC_FIELDS}
+    rows['speed'][n:] *= scale
+    rows['direction'][n:] += bearing
+    rows['altitude'][n:] += offset
+    in_conflict, swept = build_conflict_test(rows, time_interval, num_steps, horizontal_separation,
+                                             vertical_separation, conflict_test, projection, origin=origin)
+
+    others = np.delete(np.arange(n), index)
+    boxes, margins = swept()
+    if margins is None:
+        margins = separation_margins(boxes, horizontal_separation, vertical_separation)
+    if margins is not None:  # else the bound does not hold, every UAV is tested
+        boxes, margins = np.asarray(boxes), np.asarray(margins)
+        low, high = boxes[n:, 0::2].min(axis=0) - margins, boxes[n:, 1::2].max(axis=0) + margins
+        near = ((boxes[others, 0::2] <= high) & (boxes[others, 1::2] >= low)).all(axis=1)
+        others = others[near]
+    if not len(others):
+        return np.zeros(count, dtype=int)
+
+    conflicts, _, _ = in_conflict(np.arange(n, n + count)[:, None], others[None, :])
+    return conflicts.sum(axis=1)
+
+
+def plan_maneuvers(trajectories, abilities, time_interval, num_steps, horizontal_separation, vertical_separation,
+                   conflict_test='sampled', projection='enu', targets=None):
+    """
+    Choose for every yielding UAV the smallest maneuver (speed scale, bearing delta, altitude offset) that clears
+    it of every other UAV over the prediction horizon, on the whole candidate grid at once instead of one trial
+    per detector round trip. The UAVs are planned lowest priority first, each one against the fleet including
+    the maneuvers already planned. A UAV without a conflict-free candidate gets the one with the fewest conflicts.
+    The trajectories are not changed, see apply_maneuvers.
+
+    Args:
+        trajectories: trajectory set flagged by collision-detector
+        targets: uav_ids to maneuver (see mutate.yielding_uavs), the lower priority collider if None
+        (other arguments as in collision_detector.detect_collisions)
+
+    Returns:
+        (True, plan) with plan a list of (trajectory, speed_scale, bearing_delta, altitude_offset, conflicts_left),
+        or (False, message) if there is nothing to resolve
+    """
+    collision_trajectories = [t for t in trajectories if t.get('collision', False)]
+    if len(collision_trajectories) <= 1:
+        logger.error(f'[mutate fn] (search) Not enough collisions to determine lower priority UAV: {collision_trajectories}')
+        return False, f'(search) Not enough collisions to determine lower priority UAV: {collision_trajectories}'
+
+    origin = fleet_origin(trajectories)  # the frame collision-detector projects this fleet into
+    fleet = fleet_to_arrays(trajectories)
+    index_of = {id(trajectory): index for index, trajectory in enumerate(trajectories)}
+    movers = sorted(lower_colliders(collision_trajectories, targets),
+                    key=lambda t: priority_rank(t, abilities), reverse=True)
+
+    plan = []
+    for trajectory in movers:
+        index = index_of[id(trajectory)]
+        grid = candidate_grid(trajectory, abilities)
+        conflicts = score_candidates(fleet, index, grid, origin, time_interval, num_steps, horizontal_separation,
+                                     vertical_separation, conflict_test, projection)
+        best = int(np.lexsort((grid[3], conflicts))[0])  # fewest conflicts, then smallest deviation
+        scale, bearing, offset = float(grid[0][best]), float(grid[1][best]), float(grid[2][best])
+        if conflicts[best]:
+            logger.info(f"[mutate fn] no conflict-free maneuver for UAV {trajectory['uav_id']}, "
+                        f"{int(conflicts[best])} conflict(s) left")
+        # the next UAVs are scored against this maneuver
+        fleet['speed'][index] *= scale
+        fleet['direction'][index] += bearing
+        fleet['altitude'][index] += offset
+        plan.append((trajectory, scale, bearing, offset, int(conflicts[best])))
+    return True, plan
+
+
+def apply_maneuvers(trajectories, plan):
+    """
+    Apply the maneuvers of plan_maneuvers and set the flags of the mutated trajectories.
+
+    Returns:
+        mutation cases bits of the maneuvers actually applied: 0b001 speed, 0b010 direction, 0b100 altitude
+    """
+    applied = 0
+    for trajectory, scale, bearing, offset, _ in plan:
+        cases = (0b001 if scale != 1 else 0) | (0b010 if bearing else 0) | (0b100 if offset else 0)
+        if not cases:
+            continue  # already clear, e.g. thanks to the maneuver of its partner
+        original = (trajectory['speed'], trajectory['direction'], trajectory['altitude'])
+        trajectory['speed'] = trajectory['speed'] * scale
+        trajectory['direction'] = (trajectory['direction'] + bearing) % 360
+        trajectory['altitude'] = trajectory['altitude'] + offset
+        applied |= cases
+
+        # set flags
+        trajectory['origin'] = 'mutate'  # flag the updated trajectory
+        trajectory['mutation_cases'] = f"{int(trajectory.get('mutation_cases', '000'), 2) | cases:03b}"
+        logger.info(f"[mutate fn] maneuvered UAV {trajectory['uav_id']}: (speed, direction, altitude) "
+                    f"from {original} to {(trajectory['speed'], trajectory['direction'], trajectory['altitude'])}")
+
+    # Remove the "collision" key from each trajectory in collision_trajectories
+    for trajectory in trajectories:
+        if 'collision' in trajectory:
+            del trajectory['collision']
+    return applied
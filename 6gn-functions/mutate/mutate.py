@@ -4,8 +4,52 @@ import random
 logger = logging.getLogger(__name__)
 
 
-# decreases the speed of the lower priority UAV with a collision (from two colliding UAVs)
-def dec_speed_of_lower_collider(trajectories, abilities):
+def lower_colliders(collision_trajectories, targets=None):
+    """
+    Trajectories a mutation case changes: the ones of targets if given, otherwise the highest uav_id
+    (lower priority) among the colliding ones.
+    """
+    if targets is not None:
+        return [t for t in collision_trajectories if t['uav_id'] in targets]
+    # Find the trajectory with the highest uav_id (Lower priority)
+    return [max(collision_trajectories, key=lambda t: t['uav_id'])]
+
+
+def priority_rank(trajectory, abilities):
+    """
+    Sort key of a UAV, the greater one gives way: the 'priority' of its uav_type in abilities.json
+    (1 is the highest priority, unknown types give way first), then the uav_id.
+    """
+    priority = abilities.get(trajectory.get('uav_type'), {}).get('priority')
+    return (float('inf') if priority is None else priority, trajectory['uav_id'])
+
+
+def yielding_uavs(trajectories, conflicts, abilities):
+    """
+    UAVs to change so that every conflicting pair has one maneuvering UAV, each UAV at most once.
+    Every pair first designates its lower priority UAV (see priority_rank). A designated UAV is then spared,
+    highest priority first, if all of its conflicts are covered by the other designated UAVs.
+
+    Args:
+        conflicts: conflicting pairs found by collision-detector (see collision_detector.conflict_record)
+
+    Returns:
+        set of the uav_ids to change
+    """
+    by_id = {t['uav_id']: t for t in trajectories}
+    pairs = [conflict['uav_ids'] for conflict in conflicts
+             if conflict['uav_ids'][0] in by_id and conflict['uav_ids'][1] in by_id]
+    selected = {max(pair, key=lambda uav_id: priority_rank(by_id[uav_id], abilities)) for pair in pairs}
+    for uav_id in sorted(selected, key=lambda uav_id: priority_rank(by_id[uav_id], abilities)):
+        partners = [pair[1] if pair[0] == uav_id else pair[0] for pair in pairs if uav_id in pair]
+        if all(partner in selected for partner in partners):
+            selected.discard(uav_id)
+    return selected
+
+
+# decreases the speed of the lower priority UAV with a collision (from two colliding UAVs),
+# or of every UAV in targets (see yielding_uavs)
+def dec_speed_of_lower_collider(trajectories, abilities, targets=None):
     # Filter trajectories with collision set to True
     collision_trajectories = [t for t in trajectories if t.get('collision', False)]
 
@@ -14,31 +58,30 @@ def dec_speed_of_lower_collider(trajectories, abilities):
             f'[mutate fn] (case1) Not enough collisions to determine lower priority UAV: {collision_trajectories}')
         return False, f'(case1) Not enough collisions to determine lower priority UAV: {collision_trajectories}'
 
-    # Find the trajectory with the highest uav_id (Lower priority)
-    lowest_uav_id_trajectory = max(collision_trajectories, key=lambda t: t['uav_id'])  #TODO proper priority check
+    for lowest_uav_id_trajectory in lower_colliders(collision_trajectories, targets):
+        # Decrease the speed by 25% (inplace)
+        original_speed = lowest_uav_id_trajectory['speed']
+        lowest_uav_id_trajectory['speed'] = original_speed * 0.75
 
-    # Decrease the speed by 25% (inplace)
-    original_speed = lowest_uav_id_trajectory['speed']
-    lowest_uav_id_trajectory['speed'] = original_speed * 0.75
+        # set flags
+        lowest_uav_id_trajectory['origin'] = 'mutate'  # flag the updated trajectory
+        lowest_uav_id_trajectory['mutation_cases'] = f"{int(lowest_uav_id_trajectory.get('mutation_cases', '000'), 2) | 0b001:03b}"  # binary flag for Case 1. supposed to be null
 
-    # set flags
-    lowest_uav_id_trajectory['origin'] = 'mutate'  # flag the updated trajectory
-    lowest_uav_id_trajectory['mutation_cases'] = f"{int(lowest_uav_id_trajectory.get('mutation_cases', '000'), 2) | 0b001:03b}"  # binary flag for Case 1. supposed to be null
+        logger.info(
+            f"[mutate fn] Decreased speed of UAV {lowest_uav_id_trajectory['uav_id']} from {original_speed} to {lowest_uav_id_trajectory['speed']}")
 
     # Remove the "collision" key from each trajectory in collision_trajectories
     for trajectory in collision_trajectories:
         if 'collision' in trajectory:
             del trajectory['collision']
 
-    logger.info(
-        f"[mutate fn] Decreased speed of UAV {lowest_uav_id_trajectory['uav_id']} from {original_speed} to {lowest_uav_id_trajectory['speed']}")
-
     return True, trajectories
 
 
-# changes the direction of the lower priority UAV with a collision (from two colliding UAVs)
-def change_dir_of_lower_collider(trajectories,
-                                 abilities):  # some functionalities are work in progress (waiting for TUW)
+# changes the direction of the lower priority UAV with a collision (from two colliding UAVs),
+# or of every UAV in targets (see yielding_uavs)
+def change_dir_of_lower_collider(trajectories, abilities,
+                                 targets=None):  # some functionalities are work in progress (waiting for TUW)
     # Filter trajectories with collision set to True
     collision_trajectories = [t for t in trajectories if t.get('collision', False)]
 
@@ -47,39 +90,51 @@ def change_dir_of_lower_collider(trajectories,
             f'[mutate fn] (case2) Not enough collisions to determine lower priority UAV: {collision_trajectories}')
         return False, f'(case2) Not enough collisions to determine lower priority UAV: {collision_trajectories}'
 
-    # Find the trajectory with the highest uav_id (Lower priority)
-    lowest_uav_id_trajectory = max(collision_trajectories,
-                                   key=lambda t: t['uav_id'])  #TODO proper priority check + PDOP?
+    lowest_trajectories = lower_colliders(collision_trajectories, targets)  #TODO PDOP?
+    for lowest_uav_id_trajectory in lowest_trajectories:
+        if lowest_uav_id_trajectory.get('uav_type', None) is None:
+            logger.error(f'[mutate fn] No uav_type key found in trajectory: {lowest_uav_id_trajectory}')
+            return False, f' No uav_type key found in trajectory: {lowest_uav_id_trajectory}'
 
-    uav_type = lowest_uav_id_trajectory.get('uav_type', None)
-    if uav_type is None:
-        logger.error(f'[mutate fn] No uav_type key found in trajectory: {lowest_uav_id_trajectory}')
-        return False, f' No uav_type key found in trajectory: {lowest_uav_id_trajectory}'
+    for lowest_uav_id_trajectory in lowest_trajectories:
+        uav_ability = abilities.get(lowest_uav_id_trajectory['uav_type'], {})
+        max_bearing = float(uav_ability.get('max_bearing', 0))
 
-    uav_ability = abilities.get(uav_type, {})
-    max_bearing = float(uav_ability.get('max_bearing', 0))
+        # NEW: sensible defaults so we don’t end up with 0° change
+        if max_bearing <= 0:
+            max_bearing = 15.0  # degrees
 
-    # NEW: sensible defaults so we don’t end up with 0° change
-    if max_bearing <= 0:
-        max_bearing = 15.0  # degrees
+        min_bearing = 5.0  # don’t do tiny/no-op changes
+        sign = -1 if random.random() < 0.5 else 1
+        bearing_change = sign * max(min_bearing, random.uniform(0, max_bearing))
 
-    min_bearing = 5.0  # don’t do tiny/no-op changes
-    sign = -1 if random.random() < 0.5 else 1
-    bearing_change = sign * max(min_bearing, random.uniform(0, max_bearing))
+        original_dir = lowest_uav_id_trajectory['direction']
+        lowest_uav_id_trajectory['direction'] = (original_dir + bearing_change) % 360
 
-    original_dir = lowest_uav_id_trajectory['direction']
-    lowest_uav_id_trajectory['direction'] = (original_dir + bearing_change) % 360
+        # set flags
+        lowest_uav_id_trajectory['origin'] = 'mutate'  # flag the updated trajectory
+        lowest_uav_id_trajectory['mutation_cases'] = f"{int(lowest_uav_id_trajectory.get('mutation_cases', '000'), 2) | 0b010:03b}"  # binary flag for Case 2
 
-    # set flags
-    lowest_uav_id_trajectory['origin'] = 'mutate'  # flag the updated trajectory
-    lowest_uav_id_trajectory['mutation_cases'] = f"{int(lowest_uav_id_trajectory.get('mutation_cases', '000'), 2) | 0b010:03b}"  # binary flag for Case 2
+        logger.info(
+            f"[mutate fn] changed dir of UAV {lowest_uav_id_trajectory['uav_id']} from {original_dir} to {lowest_uav_id_trajectory['direction']}")
 
     # Remove the "collision" key from each trajectory in collision_trajectories
     for trajectory in collision_trajectories:
         if 'collision' in trajectory:
             del trajectory['collision']
 
-    logger.info(
-        f"[mutate fn] changed dir of UAV {lowest_uav_id_trajectory['uav_id']} from {original_dir} to {lowest_uav_id_trajectory['direction']}")
+    return True, trajectories
+
+
+# raises the altitude of the lower priority UAV with a collision above the vertical separation (Case 3),
+# or of every UAV in targets (see yielding_uavs)
+def raise_alt_of_lower_collider(trajectories, vertical_separation, targets=None):
+    for lowest in lower_colliders([t for t in trajectories if t.get('collision')], targets):
+        original_alt = lowest['altitude']
+        lowest['altitude'] = original_alt + (vertical_separation + 10)
+        lowest['origin'] = 'mutate'
+        lowest['mutation_cases'] = '111'
+
+        logger.info(f"[mutate fn] raised alt of UAV {lowest['uav_id']} from {original_alt} to {lowest['altitude']}")
 
     return True, trajectories
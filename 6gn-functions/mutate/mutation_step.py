@@ -0,0 +1,148 @@
+import os
+import json
+import logging
+
+from mutate import dec_speed_of_lower_collider, change_dir_of_lower_collider, raise_alt_of_lower_collider, yielding_uavs
+from maneuver_search import plan_maneuvers, apply_maneuvers
+
+logger = logging.getLogger(__name__)
+
+MAX_MUTATIONS = 100  # TODO: get from ENV
+
+VERTICAL_SEPARATION   = 300    # metri
+# same settings as collision-detector, so that a set resolved here is also safe for the detector
+TIME_INTERVAL = 1
+NUM_STEPS = 10
+HORIZONTAL_SEPARATION = 0.20   # 200m
+CONFLICT_TEST = os.getenv("CONFLICT_TEST", "sampled")  # 'sampled' or 'cpa', see collision_detector.detect_collisions
+PROJECTION = os.getenv("PROJECTION", "enu")  # 'enu' or 'great_circle', see collision_detector.detect_collisions
+# apply every mutation case to one UAV per conflicting pair (see mutate.yielding_uavs) instead of a single UAV
+BATCH_RESOLUTION = os.getenv("BATCH_RESOLUTION", "true").lower() == "true"
+# pick the maneuvers on a grid of candidates scored against the fleet (see maneuver_search) before the fixed cases
+MANEUVER_SEARCH = os.getenv("MANEUVER_SEARCH", "false").lower() == "true"
+
+ALL_CASES = 0b111  # speed, direction and altitude
+
+
+def mutations_exhausted(meta):
+    """
+    Returns:
+        True if a further mutate_step would forward the set unchanged: every case is applied and, with
+        MANEUVER_SEARCH, the last-resort maneuvers too
+    """
+    return int(meta.get('mutation_cases', '000'), 2) == ALL_CASES and \
+        (not MANEUVER_SEARCH or meta.get('maneuver_fallback', False))
+
+
+def mutate_step(data, meta, abilities, tracer, conflicts=None):
+    """
+    One mutate invocation: counts the mutation in meta, applies the next mutation case to data and sets meta up
+    for the collision-detector re-check (origin 'system', updated mutation_cases).
+    Shared by the mutate function and the fused pipeline function, with the same spans.
+
+    Args:
+        data: trajectory set flagged by collision-detector, mutated in place
+        meta: request metadata, updated in place
+        abilities: UAV abilities per uav_type (abilities.json)
+        tracer: OpenTelemetry tracer of the calling function
+        conflicts: conflicting pairs found by collision-detector, the whole batch is resolved at once if given
+
+    Returns:
+        (mutated trajectory set, None), or (None, message) if the request is aborted
+    """
+    # TODO: merge MAX_MUTATIONS check with "mutation cases"?
+    # (check &) increment the number of mutations (guard clauses)
+    with tracer.start_as_current_span('process_mutate_count', attributes={"origin": meta.get('origin'),
+                                                                          "mutations": meta.get('mutations',
+                                                                                                None)}) as process_mutate_count_span:
+        if 'mutations' in meta and meta['origin'] == 'system':  # previously mutated
+            logger.info(f"[mutate fn] the trajectory was mutated {meta['mutations']} time(s).")
+            if meta['mutations'] > MAX_MUTATIONS:
+                logger.warning(
+                    f"[mutate fn] the trajectory has been mutated more than {MAX_MUTATIONS} times. Aborting the request.")
+                return None, f"Trajectory mutated more than {MAX_MUTATIONS} times. Aborting."
+            meta['mutations'] += 1
+        elif 'mutations' not in meta and meta['origin'] == 'self_report':  # first time being mutated
+            logger.info("[mutate fn] first time mutating the trajectory.")
+            meta['mutations'] = 1
+        else:
+            msg = f"[mutate fn] fatal! unexpected origin or mutations value. origin: {meta['origin']}"
+            process_mutate_count_span.set_attribute("error", True)
+            logger.fatal(msg)
+            return None, msg  # guard clause
+
+    # apply mutation cases
+    with tracer.start_as_current_span('mutation') as mutation_cases_span:
+        mutation_cases_str = meta.get('mutation_cases', '000')  # replace with bin 000 if None
+        logger.info(f"[mutate fn] mutation_cases: {mutation_cases_str}")
+        mutation_cases = int(mutation_cases_str, 2)  # parse as binary
+        targets = None  # the lower priority collider only
+        if BATCH_RESOLUTION and conflicts:
+            targets = yielding_uavs(data, conflicts, abilities)
+            mutation_cases_span.set_attribute("targets", len(targets))
+            logger.info(f"[mutate fn] resolving {len(conflicts)} conflict(s) by changing UAVs {sorted(targets)}")
+
+        plan = None  # searched maneuvers, applied instead of the next mutation case when they clear their UAVs
+        if MANEUVER_SEARCH:
+            with tracer.start_as_current_span('maneuver_search', attributes={"conflict_test": CONFLICT_TEST,
+                                                                             "projection": PROJECTION}) as search_span:
+                success, searched = plan_maneuvers(data, abilities, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION,
+                                                   VERTICAL_SEPARATION, CONFLICT_TEST, PROJECTION, targets)
+                if not success:
+                    search_span.set_attribute("error", True)
+                    search_span.set_attribute("error_details", searched)
+                    return None, json.dumps({"error": searched})  # searched is just a string message here
+                conflicts_left = sum(maneuver[4] for maneuver in searched)
+                changes = any(maneuver[1:4] != (1.0, 0.0, 0.0) for maneuver in searched)
+                search_span.set_attribute("conflicts_left", conflicts_left)
+                # a conflict-free plan takes its UAVs out of the conflict set for good, so every such round
+                # makes progress; a partial plan is only the last resort, once, when every case is applied
+                if changes and conflicts_left == 0:
+                    plan = searched
+                elif mutation_cases == ALL_CASES and not meta.get('maneuver_fallback', False):
+                    meta['maneuver_fallback'] = True  # tried once, the maneuvers would stack up otherwise
+                    if changes:
+                        plan = searched
+                        logger.info(f"[mutate fn] every mutation case applied, "
+                                    f"applying the best maneuvers found ({conflicts_left} conflict(s) left)")
+                else:
+                    logger.info(f"[mutate fn] maneuver search leaves {conflicts_left} conflict(s), "
+                                f"applying the next mutation case instead")
+
+        # the ladder is dispatched on the lowest unset bit, the search may have set any of them
+        if plan is not None:
+            mutated_trajectory_set = data
+            updated_mutation_cases = mutation_cases | apply_maneuvers(data, plan)  # bits of the applied maneuvers
+        elif not mutation_cases & 0b001:
+            with tracer.start_as_current_span('case1_mutation') as case1_span:
+                success, mutated_trajectory_set = dec_speed_of_lower_collider(data, abilities, targets)  # Case 1
+                if not success:
+                    case1_span.set_attribute("error", True)
+                    case1_span.set_attribute("error_details", mutated_trajectory_set)
+                    return None, json.dumps(
+                        {"error": mutated_trajectory_set})  # mutated_trajectory_set is just a string message here
+                updated_mutation_cases = mutation_cases | 0b001  # set the first bit to 1
+        elif not mutation_cases & 0b010:
+            with tracer.start_as_current_span('case2_mutation') as case2_span:
+                success, mutated_trajectory_set = change_dir_of_lower_collider(data, abilities, targets)
+                if not success:
+                    case2_span.set_attribute("error", True)
+                    case2_span.set_attribute("error_details", mutated_trajectory_set)
+                    return None, json.dumps(
+                        {"error": mutated_trajectory_set})  # mutated_trajectory_set is just a string message here
+                updated_mutation_cases = mutation_cases | 0b010  # set the second bit to 1
+        # mutate.py – dopo i casi 1 e 2
+        elif not mutation_cases & 0b100:
+            success, mutated_trajectory_set = raise_alt_of_lower_collider(data, VERTICAL_SEPARATION, targets)
+            updated_mutation_cases = ALL_CASES
+
+        else:
+            # All known mutations already applied (bits 1 & 2). Do NOT stop here.
+            # Just carry current data forward so collision-detector can re-check and, if safe, call release.
+            logger.info(f"[mutate fn] all mutation cases applied (mutation_cases={mutation_cases_str}); re-checking collisions.")
+            mutated_trajectory_set = data
+            updated_mutation_cases = mutation_cases  # keep the bits as-is
+
+    meta['origin'] = "system"  # change origin of the data if it is 'self_report'
+    meta['mutation_cases'] = f'{updated_mutation_cases:03b}'  # convert back to binary string
+    return mutated_trajectory_set, None
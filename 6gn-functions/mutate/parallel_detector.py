@@ -0,0 +1,133 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from broad_phase import candidate_partners
+from vectorized_detector import (KINEMATIC_FIELDS, fleet_to_arrays, build_conflict_test, dense_conflicts,
+                                 pair_list_conflicts, merge_conflicts, apply_conflicts, detect_collisions_vectorized)
+
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_FLEET = int(os.getenv("PARALLEL_MIN_FLEET", "2000"))  # smaller fleets stay single-process
+BLOCKS_PER_WORKER = 4  # more blocks than workers, so that a slow block does not idle the others
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Process pool created once per container and reused by every invocation.
+    'spawn' is used because the tinyFaaS handler is multi-threaded, and forking a threaded process is unsafe.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = multiprocessing.get_context("spawn").Pool(PARALLEL_WORKERS)
+            atexit.register(_pool.terminate)
+        return _pool
+
+
+def row_blocks(n, blocks):
+    """
+    Split the rows of the upper triangle i < j into contiguous blocks holding about the same number of pairs.
+
+    Returns:
+        list of (start, stop) row ranges
+    """
+    pairs_before = np.cumsum(np.arange(n - 1, 0, -1))  # pairs in rows 0..i
+    targets = np.linspace(0, pairs_before[-1], blocks + 1)[1:-1]
+    bounds = [0] + sorted(set(int(row) + 1 for row in np.searchsorted(pairs_before, targets))) + [n - 1]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def pair_blocks(count, blocks):
+    """
+    Split a list of count candidate pairs into contiguous blocks of about the same size.
+
+    Returns:
+        list of (start, stop) ranges of the pair list
+    """
+    bounds = sorted(set(np.linspace(0, count, blocks + 1).astype(int).tolist()))
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def evaluate_block(task):
+    """
+    Worker side: attach to the shared fleet, evaluate one block and return its conflicting pairs.
+    A block is either a range of rows of the upper triangle (pairs is None) or an explicit list of
+    broad-phase candidate pairs.
+
+    Returns:
+        (first, second, time_to_conflict, min_separation) arrays of the conflicting pairs, first < second
+    """
+    (name, n, start, stop, pairs, time_interval, num_steps, horizontal_separation, vertical_separation,
+     conflict_test, projection) = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        columns = np.ndarray((len(KINEMATIC_FIELDS), n), dtype=np.float64, buffer=shm.buf)
+        in_conflict, _ = build_conflict_test(dict(zip(KINEMATIC_FIELDS, columns)), time_interval, num_steps,
+                                             horizontal_separation, vertical_separation, conflict_test, projection)
+        del columns  # nothing read from the shared buffer outlives this block
+        if pairs is not None:
+            return pair_list_conflicts(in_conflict, *pairs)
+        return dense_conflicts(in_conflict, start, stop, n)
+    finally:
+        shm.close()
+
+
+def detect_collisions_parallel(aircraft_list, time_interval, num_steps, horizontal_separation, vertical_separation,
+                               broad_phase=False, conflict_test='sampled', projection='enu'):
+    """
+    Same contract as collision_detector.detect_collisions, sharded over a persistent process pool.
+    The fleet is written once into a shared memory block that workers read without pickling, the pair space
+    is split into balanced blocks, and the conflicting pairs of every block are merged into one conflict list.
+    Without broad_phase the blocks are row ranges of the upper triangle; with broad_phase the candidate pairs
+    are computed here and the list is cut into contiguous blocks of pair checks.
+    Fleets below PARALLEL_MIN_FLEET run on the single-process vectorized engine.
+
+    Returns:
+        True if there is a conflict, False otherwise.
+        Modified aircraft_list with "collision": True key-value added to every aircraft involved in a conflict.
+        List of every conflicting pair (see collision_detector.conflict_record), ordered by position in aircraft_list.
+    """
+    n = len(aircraft_list)
+    if n < max(PARALLEL_MIN_FLEET, 2) or PARALLEL_WORKERS < 2:
+        return detect_collisions_vectorized(aircraft_list, time_interval, num_steps, horizontal_separation,
+                                            vertical_separation, broad_phase=broad_phase,
+                                            conflict_test=conflict_test, projection=projection)
+
+    fleet = fleet_to_arrays(aircraft_list)
+    blocks = PARALLEL_WORKERS * BLOCKS_PER_WORKER
+    if broad_phase:
+        _, swept = build_conflict_test(fleet, time_interval, num_steps, horizontal_separation, vertical_separation,
+                                       conflict_test, projection)
+        boxes, margins = swept()
+        partners = candidate_partners(boxes, horizontal_separation, vertical_separation, margins=margins)
+        first = np.fromiter((i for i, partner_list in enumerate(partners) for _ in partner_list), dtype=np.intp)
+        second = np.fromiter((j for partner_list in partners for j in partner_list), dtype=np.intp)
+        if not len(first):
+            return False, aircraft_list, []
+        # each worker receives its own slice of the candidate list, ordered by (i, j)
+        shards = [(0, 0, (first[start:stop], second[start:stop])) for start, stop in pair_blocks(len(first), blocks)]
+    else:
+        shards = [(start, stop, None) for start, stop in row_blocks(n, blocks)]
+
+    shm = shared_memory.SharedMemory(create=True, size=len(KINEMATIC_FIELDS) * n * 8)
+    try:
+        columns = np.ndarray((len(KINEMATIC_FIELDS), n), dtype=np.float64, buffer=shm.buf)
+        for row, field in enumerate(KINEMATIC_FIELDS):
+            columns[row] = fleet[field]
+        del columns
+        tasks = [(shm.name, n, start, stop, pairs, time_interval, num_steps, horizontal_separation,
+                  vertical_separation, conflict_test, projection) for start, stop, pairs in shards]
+        results = get_pool().map(evaluate_block, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # blocks are contiguous ranges in order, so the merged pairs stay ordered by (i, j)
+    return apply_conflicts(aircraft_list, *merge_conflicts(results))
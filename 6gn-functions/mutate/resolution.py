@@ -0,0 +1,91 @@
+import logging
+
+from collision_detector import build_pair_test, conflict_record
+from mutation_step import (mutate_step, mutations_exhausted, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION,
+                           VERTICAL_SEPARATION, CONFLICT_TEST, PROJECTION)
+
+logger = logging.getLogger(__name__)
+
+
+def recheck_conflicts(trajectories, conflicts):
+    """
+    Re-check the trajectory set after a mutation, with the detector's pair test. Only the pairs of the mutated
+    UAVs (origin 'mutate') are tested again, the verdicts of the other pairs are taken from conflicts.
+    The 'collision' flags are set as collision-detector sets them.
+
+    Args:
+        trajectories: trajectory set, flags updated in place
+        conflicts: conflicting pairs found by collision-detector (see collision_detector.conflict_record),
+            None to test every pair
+
+    Returns:
+        list of the conflicting pairs of the set
+    """
+    pair_conflict, _ = build_pair_test(trajectories, TIME_INTERVAL, NUM_STEPS, HORIZONTAL_SEPARATION,
+                                       VERTICAL_SEPARATION, conflict_test=CONFLICT_TEST, projection=PROJECTION)
+    n = len(trajectories)
+    if conflicts is None:
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        remaining = []
+    else:
+        mutated = {t['uav_id'] for t in trajectories if t.get('origin') == 'mutate'}
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)
+                 if trajectories[i]['uav_id'] in mutated or trajectories[j]['uav_id'] in mutated]
+        remaining = [conflict for conflict in conflicts if not mutated.intersection(conflict['uav_ids'])]
+
+    rechecked = []
+    for i, j in pairs:
+        time_to_conflict, min_separation = pair_conflict(i, j)
+        if time_to_conflict is not None:
+            rechecked.append(conflict_record(trajectories[i]['uav_id'], trajectories[j]['uav_id'], time_to_conflict,
+                                             min_separation))
+    conflicts = remaining + rechecked
+
+    colliding = {uav_id for conflict in conflicts for uav_id in conflict['uav_ids']}
+    for trajectory in trajectories:
+        if trajectory['uav_id'] in colliding:
+            trajectory['collision'] = True
+        else:
+            trajectory.pop('collision', None)
+    return conflicts
+
+
+def resolve_locally(data, meta, conflicts, abilities, tracer):
+    """
+    Escalate through the mutation cases in-process, re-checking the mutated UAVs after every case, instead of
+    one collision-detector round trip per case.
+
+    Args:
+        data: trajectory set flagged by collision-detector
+        meta: request metadata, updated by every mutate_step
+        conflicts: conflicting pairs found by collision-detector, None if the payload has none
+        abilities: UAV abilities per uav_type (abilities.json)
+        tracer: OpenTelemetry tracer of the calling function
+
+    Returns:
+        (trajectory set, resolved, None): resolved is False if every mutation was applied and conflicts remain,
+        or (None, False, message) if the request is aborted
+    """
+    with tracer.start_as_current_span('local_resolution') as resolution_span:
+        rounds = 0
+        while True:
+            mutated_trajectory_set, abort_message = mutate_step(data, meta, abilities, tracer, conflicts)
+            if abort_message is not None:
+                return None, False, abort_message
+            rounds += 1
+
+            with tracer.start_as_current_span('local_recheck', attributes={"conflict_test": CONFLICT_TEST,
+                                                                           "projection": PROJECTION}) as recheck_span:
+                conflicts = recheck_conflicts(mutated_trajectory_set, conflicts)
+                recheck_span.set_attribute("conflicts", len(conflicts))
+
+            resolved = not conflicts
+            if resolved or mutations_exhausted(meta):
+                break
+            data = mutated_trajectory_set
+
+        resolution_span.set_attribute("rounds", rounds)
+        resolution_span.set_attribute("resolved", resolved)
+        logger.info(f'[mutate fn] local resolution after {rounds} round(s): '
+                    f'{"conflict-free" if resolved else f"{len(conflicts)} conflict(s) left"}')
+        return mutated_trajectory_set, resolved, None
@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mutate import yielding_uavs, lower_colliders  # noqa: E402
+
+ABILITIES = {"1": {"priority": 1}, "2": {"priority": 2}}
+
+
+def conflict(uav_id1, uav_id2):
+    return {"uav_ids": [uav_id1, uav_id2], "time_to_conflict": 1.0, "min_separation": 0.1}
+
+
+class TestYieldingUavs(unittest.TestCase):
+
+    def test_lower_priority_uav_of_a_pair_yields(self):
+        trajectories = [{"uav_id": "a", "uav_type": "2"}, {"uav_id": "b", "uav_type": "1"}]
+        self.assertEqual(yielding_uavs(trajectories, [conflict("a", "b")], ABILITIES), {"a"})
+
+    def test_same_priority_falls_back_to_the_uav_id(self):
+        trajectories = [{"uav_id": "a", "uav_type": "1"}, {"uav_id": "b", "uav_type": "1"}]
+        self.assertEqual(yielding_uavs(trajectories, [conflict("a", "b")], ABILITIES), {"b"})
+
+    def test_unknown_uav_type_yields_first(self):
+        trajectories = [{"uav_id": "a", "uav_type": "2"}, {"uav_id": "b"}]
+        self.assertEqual(yielding_uavs(trajectories, [conflict("a", "b")], ABILITIES), {"b"})
+
+    def test_every_pair_gets_one_yielding_uav_each_uav_at_most_once(self):
+        # chain c - b - a - d: c, b and d are designated, then c is spared as its only partner b yields
+        trajectories = [{"uav_id": uav_id, "uav_type": "1"} for uav_id in "abcd"]
+        pairs = [conflict("b", "c"), conflict("a", "b"), conflict("a", "d")]
+        selected = yielding_uavs(trajectories, pairs, ABILITIES)
+        for pair in pairs:
+            self.assertTrue(set(pair["uav_ids"]) & selected)
+        self.assertEqual(selected, {"b", "d"})
+
+    def test_pairs_with_an_unknown_uav_are_ignored(self):
+        trajectories = [{"uav_id": "a", "uav_type": "1"}]
+        self.assertEqual(yielding_uavs(trajectories, [conflict("a", "z")], ABILITIES), set())
+
+    def test_lower_colliders(self):
+        trajectories = [{"uav_id": "a"}, {"uav_id": "c"}, {"uav_id": "b"}]
+        self.assertEqual(lower_colliders(trajectories), [{"uav_id": "c"}])
+        self.assertEqual(lower_colliders(trajectories, {"a", "b"}), [{"uav_id": "a"}, {"uav_id": "b"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mutation_step  # noqa: E402
+from mutation_step import mutate_step, mutations_exhausted  # noqa: E402
+from maneuver_search import plan_maneuvers, apply_maneuvers  # noqa: E402
+from collision_detector import detect_collisions  # noqa: E402
+
+ABILITIES = {"1": {"min_speed": 15, "max_speed": 60, "priority": 1, "max_bearing": 30},
+             "2": {"min_speed": 30, "max_speed": 90, "priority": 2, "max_bearing": 40}}
+METERS_PER_DEGREE = 111195
+
+
+class Span:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+class Tracer:
+    def start_as_current_span(self, name, attributes=None):
+        return Span()
+
+
+def head_on_pair(speed=36.0):
+    # 300 m apart on the equator, closing at 20 m/s at the same altitude (in the ENU frame)
+    return [{"uav_id": "1", "uav_type": "1", "latitude": 0.0, "longitude": 0.0, "altitude": 100.0, "speed": speed,
+             "direction": 90.0, "vertical_speed": 0.0},
+            {"uav_id": "2", "uav_type": "2", "latitude": 0.0, "longitude": 300 / METERS_PER_DEGREE, "altitude": 100.0,
+             "speed": speed, "direction": 270.0, "vertical_speed": 0.0}]
+
+
+def detect(trajectories, conflict_test='sampled', projection='enu'):
+    collision, _, conflicts = detect_collisions([dict(t) for t in trajectories], mutation_step.TIME_INTERVAL,
+                                                mutation_step.NUM_STEPS, mutation_step.HORIZONTAL_SEPARATION,
+                                                mutation_step.VERTICAL_SEPARATION, conflict_test=conflict_test,
+                                                projection=projection)
+    return collision, conflicts
+
+
+def flagged(trajectories):
+    # as collision-detector hands them to mutate
+    _, conflicts = detect(trajectories)
+    for trajectory in trajectories:
+        trajectory["collision"] = True
+    return conflicts
+
+
+class TestMutateStep(unittest.TestCase):
+
+    def test_cases_escalate_then_the_set_is_forwarded_unchanged(self):
+        data, meta = head_on_pair(), {"origin": "self_report"}
+        progression = []
+        with mock.patch.object(mutation_step, 'MANEUVER_SEARCH', False):
+            for _ in range(4):
+                conflicts = flagged(data)
+                data, error = mutate_step(data, meta, ABILITIES, Tracer(), conflicts)
+                self.assertIsNone(error)
+                progression.append((meta["mutation_cases"], mutations_exhausted(meta)))
+        self.assertEqual(progression, [("001", False), ("011", False), ("111", True), ("111", True)])
+        self.assertEqual((meta["origin"], meta["mutations"]), ("system", 4))
+        self.assertEqual(data[1]["altitude"], 100 + mutation_step.VERTICAL_SEPARATION + 10)  # case 3 on UAV 2
+        self.assertFalse(detect(data)[0])
+
+    def test_conflict_free_maneuvers_are_applied_first(self):
+        data, meta = head_on_pair(), {"origin": "self_report"}
+        with mock.patch.object(mutation_step, 'MANEUVER_SEARCH', True):
+            data, error = mutate_step(data, meta, ABILITIES, Tracer(), flagged(data))
+        self.assertIsNone(error)
+        self.assertFalse(detect(data)[0])
+        self.assertNotEqual(meta["mutation_cases"], "000")
+        self.assertEqual(data[0]["speed"], 36.0)  # UAV 1 has the higher priority
+        self.assertEqual(data[1]["origin"], "mutate")
+
+    def test_partial_maneuvers_are_applied_once_every_case_is(self):
+        partial = lambda data, *args: (True, [(data[1], 0.9, 0.0, 0.0, 1)])  # noqa: E731, one conflict left
+        data, meta = head_on_pair(), {"origin": "self_report"}
+        with mock.patch.object(mutation_step, 'MANEUVER_SEARCH', True), \
+                mock.patch.object(mutation_step, 'plan_maneuvers', side_effect=partial):
+            data, _ = mutate_step(data, meta, ABILITIES, Tracer(), flagged(data))
+            self.assertEqual((meta["mutation_cases"], data[1]["speed"]), ("001", 36.0 * 0.75))  # case 1 instead
+
+            meta["mutation_cases"] = "111"
+            data, _ = mutate_step(data, meta, ABILITIES, Tracer(), flagged(data))
+            self.assertEqual(data[1]["speed"], 36.0 * 0.75 * 0.9)
+            self.assertTrue(meta["maneuver_fallback"])
+            self.assertTrue(mutations_exhausted(meta))
+
+            data, _ = mutate_step(data, meta, ABILITIES, Tracer(), flagged(data))
+            self.assertEqual(data[1]["speed"], 36.0 * 0.75 * 0.9)  # not stacked again
+            self.assertEqual(meta["mutation_cases"], "111")
+
+
+class TestManeuverSearch(unittest.TestCase):
+
+    def test_planned_maneuvers_are_conflict_free_for_the_detector(self):
+        for conflict_test in ('sampled', 'cpa'):
+            for projection in ('enu', 'great_circle'):
+                with self.subTest(conflict_test=conflict_test, projection=projection):
+                    # the great-circle model moves speed / 3600 degrees per second, same closing speed
+                    data = head_on_pair(36.0 if projection == 'enu' else 36.0 / (METERS_PER_DEGREE / 1000))
+                    collision, _ = detect(data, conflict_test, projection)
+                    self.assertTrue(collision)
+                    for trajectory in data:
+                        trajectory["collision"] = True
+                    success, plan = plan_maneuvers(data, ABILITIES, mutation_step.TIME_INTERVAL,
+                                                   mutation_step.NUM_STEPS, mutation_step.HORIZONTAL_SEPARATION,
+                                                   mutation_step.VERTICAL_SEPARATION, conflict_test, projection)
+                    self.assertTrue(success)
+                    self.assertEqual([maneuver[4] for maneuver in plan], [0])
+                    self.assertTrue(apply_maneuvers(data, plan))
+                    self.assertFalse(detect(data, conflict_test, projection)[0])
+
+    def test_nothing_to_resolve(self):
+        success, _ = plan_maneuvers(head_on_pair(), ABILITIES, 1, 10, 0.2, 300)  # no trajectory is flagged
+        self.assertFalse(success)
+
+
+if __name__ == '__main__':
+    unittest.main()
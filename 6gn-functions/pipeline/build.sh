@@ -0,0 +1,31 @@
+#!/bin/bash
+
+# build.sh [build-dir]
+# assembles the fused pipeline function: the stage modules of update, trigger, collision-detector, mutate and
+# release (without their fn.py and call_next_func.py) next to this folder's fn.py
+
+set -e
+
+cd "$(dirname "$0")"
+BUILD_DIR="${1:-build}"
+
+rm -rf "$BUILD_DIR"
+mkdir -p "$BUILD_DIR"
+
+# later stages win on a module with the same name
+for stage in update trigger collision-detector mutate release; do
+    for f in ../"$stage"/*.py ../"$stage"/*.json; do
+        [ -e "$f" ] || continue
+        name="$(basename "$f")"
+        case "$name" in
+            fn.py|call_next_func.py|http_session.py) continue ;;
+        esac
+        if [ -e "$BUILD_DIR/$name" ] && ! cmp -s "$f" "$BUILD_DIR/$name"; then
+            echo "note: $name differs between stages, using $stage's"
+        fi
+        cp "$f" "$BUILD_DIR/"
+    done
+done
+
+cp fn.py requirements.txt "$BUILD_DIR/"
+echo "pipeline function assembled in $BUILD_DIR"
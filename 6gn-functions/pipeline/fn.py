@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+import json
+import uuid
+import typing
+import logging
+
+from timestamp_for_logger import CustomFormatter
+from tracer import TracerInitializer
+from codec import decode_payload, input_attribute
+# stage modules, copied next to this file by build.sh
+from store_update import store_update, wait_for_store  # update
+from get_recent_trajectories import get_recent_trajectories, TRAJECTORY_QUERY, LATEST_POSITIONS, FLEET_VIEW  # trigger
+from mongo_client import get_database  # trigger
+from schema import bootstrap_schema  # update and trigger
+from fleet import Fleet  # collision-detector
+from detection import find_collisions  # collision-detector
+from mutation_step import mutate_step  # mutate
+from publisher import publish_release, QOS, PER_UAV_TOPICS, AGGREGATE_TOPIC  # release
+
+# Set up Python logger. milliseconds are not supported by default
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%H:%M:%S.%f'
+)
+logger = logging.getLogger(__name__)
+for handler in logging.getLogger().handlers:  # Apply the custom formatter to the root logger
+    handler.setFormatter(CustomFormatter(handler.formatter._fmt, handler.formatter.datefmt))
+
+# Initialize the OpenTelemetry tracer
+tracer = TracerInitializer("pipeline").tracer
+
+# Load abilities from JSON file (mutate)
+with open('abilities.json', 'r') as f:
+    abilities = json.load(f)
+
+TTL = 100  # seconds, as in trigger
+
+bootstrap_schema(get_database())  # cold start: make sure the trajectories indexes exist
+
+
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
+    """
+    input: A JSON string of collection of new trajectories, as for the update function
+    output: stores the data and, for a self report, runs trigger, collision-detector, mutate and release in-process
+    """
+    with tracer.start_as_current_span('fn') as main_span:
+        main_span.set_attribute("invoke_count", Counter.increment_count())
+        main_span.set_attribute("input", input_attribute(input))
+        logger.info(f'[pipeline fn] invoke count: {str(Counter.get_count())}')
+        # Parse the JSON string into a Python list of dictionaries
+        with tracer.start_as_current_span('parse_input'):
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
+            logger.debug(f'[pipeline fn] Parsed input: {parsed_input}')
+
+            data = parsed_input.get('data', [])
+            meta = parsed_input.get('meta', {})
+
+        # Check the 'origin' in 'meta'
+        origin = meta.get('origin', None)
+        if origin is None:
+            logger.error(f'[pipeline fn] No origin key found in meta')
+            main_span.set_attribute("error", True)
+            main_span.set_attribute("error_details", f'No origin key found in meta. dump: {meta}')
+            return f'No origin key found in meta. dump: {meta}'
+
+        if not update_stage(data, meta, origin):
+            return str(data)
+
+        recent_trajectories = trigger_stage(meta)
+        if not recent_trajectories:
+            return 'No recent trajectories found'
+
+        # collision-detector <-> mutate until the trajectory set is safe, as the two functions do over HTTP
+        data = recent_trajectories
+        while True:
+            with tracer.start_as_current_span('collision-detector', attributes={"origin": meta['origin'],
+                                                                                "mutations": meta.get('mutations', 0)}):
+                fleet = Fleet.from_records(data)  # struct-of-arrays, turned back into dictionaries only for mutate
+                collision_exists, flagged_fleet, conflicts = find_collisions(fleet, meta, tracer)
+
+            if not collision_exists:
+                if meta['origin'] == 'self_report':
+                    logger.info("[pipeline fn] Do nothing. (safe and self_report)")
+                    return 'Do nothing (safe and self_report)'
+                break  # safe and from system: release
+
+            with tracer.start_as_current_span('mutate', attributes={"conflicts": len(conflicts)}):
+                data, abort_message = mutate_step(flagged_fleet.to_records(), meta, abilities, tracer, conflicts)
+                if abort_message is not None:
+                    return abort_message
+
+        release_stage(data, meta)
+        return 'released mutated trajectories (pipeline)'
+
+
+def update_stage(data, meta, origin):
+    """
+    Store the reported trajectories, with the spans of the update function.
+
+    Returns:
+        True if the pipeline goes on with trigger (self report), False otherwise
+    """
+    with tracer.start_as_current_span('update'):
+        with tracer.start_as_current_span('store_n_decide_to_trigger') as store_n_decide_span:
+            store_n_decide_span.set_attribute("origin", origin)
+            if origin == 'system':  # released data posted from outside, this function releases its own in-process
+                logger.info(f'[pipeline fn] will NOT trigger as it is from system. storing the released data. dump: {data}')
+                try:
+                    store_update(data)  # IO operation
+                except Exception as e:
+                    logger.error(f'[pipeline fn] Error in store_update: {e}')
+                    store_n_decide_span.set_attribute("error", True)
+                    store_n_decide_span.set_attribute("error_details", e)
+                return False
+            if origin != 'self_report':
+                logger.fatal(f'[pipeline fn] Unknown origin: {origin}')
+                store_n_decide_span.set_attribute("error", True)
+                store_n_decide_span.set_attribute("error_details", f'Unknown origin: {origin}')
+                return False
+            ticket = None
+            try:
+                ticket = store_update(data, barrier=True)  # IO operation (buffered when write-behind is enabled)
+            except Exception as e:
+                logger.error(f'[pipeline fn] Error in store_update: {e}')
+                store_n_decide_span.set_attribute("error", True)
+                store_n_decide_span.set_attribute("error_details", e)
+            # get_recent_trajectories reads the fleet from the db, so the report has to be written first
+            with tracer.start_as_current_span('wait_for_store') as wait_for_store_span:
+                try:
+                    wait_for_store(ticket)  # IO operation
+                except Exception as e:
+                    logger.error(f'[pipeline fn] Error in wait_for_store: {e}')
+                    wait_for_store_span.set_attribute("error", True)
+                    wait_for_store_span.set_attribute("error_details", e)
+            if len(data) == 1:  # lets collision-detector re-check only the reporting UAV (incremental mode)
+                meta['uav_id'] = data[0].get('uav_id')
+            # the fleet view is only used once it holds these reports
+            meta['reported_at'] = {element.get('uav_id'): element['created_at'] for element in data
+                                  if 'created_at' in element}
+    return True
+
+
+def trigger_stage(meta):
+    """
+    Read the recent fleet, with the spans of the trigger function.
+
+    Returns:
+        the recent trajectories, or an empty list
+    """
+    with tracer.start_as_current_span('trigger'):
+        with tracer.start_as_current_span('gen_req_uid') as gen_req_uid_span:
+            meta['request_id'] = str(uuid.uuid4())
+            gen_req_uid_span.set_attribute("request_id", meta['request_id'])
+
+        bootstrap_schema(get_database())  # no-op once done, retried with backoff after a failed attempt
+
+        with tracer.start_as_current_span('get_recent_trajectories', attributes={"ttl": TTL, "query": TRAJECTORY_QUERY, "latest_positions": LATEST_POSITIONS, "fleet_view": FLEET_VIEW}) as get_recent_trajectories_span:
+            try:
+                recent_trajectories = get_recent_trajectories(TTL, meta.pop('reported_at', None))
+            except Exception as e:
+                logger.error(f'[pipeline fn] Error in get_recent_trajectories: {e}')
+                get_recent_trajectories_span.set_attribute("error", True)
+                get_recent_trajectories_span.set_attribute("error_details", e)
+                return []
+
+        with tracer.start_as_current_span('post_risk_eval_if_any_traj') as post_risk_eval_if_any_traj_span:
+            post_risk_eval_if_any_traj_span.set_attribute("recent_trajectories_size", len(recent_trajectories))
+            if not recent_trajectories:
+                logger.error(f'[pipeline fn] No recent trajectories found')
+                post_risk_eval_if_any_traj_span.set_attribute("error", True)
+                post_risk_eval_if_any_traj_span.set_attribute("error_details", "No recent trajectories found")
+                return []
+            return recent_trajectories
+
+
+def release_stage(data, meta):
+    """
+    Publish the mutated trajectories and store them, with the spans of the release function and of update
+    (origin 'system').
+    """
+    with tracer.start_as_current_span('release'):
+        # Select elements where 'origin' is 'mutated'
+        with tracer.start_as_current_span('filter_mutated_elems'):
+            mutated_data = list(filter(lambda item: item.get('origin', None) == 'mutate', data))
+            logger.debug(f'[pipeline fn] Mutated data to release: {mutated_data}')
+
+        with tracer.start_as_current_span('publish_release') as pub_span:
+            pub_span.set_attribute("QoS", QOS)
+            pub_span.set_attribute("per_uav_topics", PER_UAV_TOPICS)
+            pub_span.set_attribute("aggregate_topic", AGGREGATE_TOPIC)
+            publish_release(mutated_data)
+
+    with tracer.start_as_current_span('update'):
+        with tracer.start_as_current_span('store_n_decide_to_trigger') as store_n_decide_span:
+            store_n_decide_span.set_attribute("origin", meta['origin'])
+            logger.info(f'[pipeline fn] storing the released data. dump: {mutated_data}')
+            try:  # NOTE: multiple trajectories can be released by the system
+                store_update(mutated_data)  # IO operation
+            except Exception as e:
+                logger.error(f'[pipeline fn] Error in store_update: {e}')
+                store_n_decide_span.set_attribute("error", True)
+                store_n_decide_span.set_attribute("error_details", e)
+
+
+class Counter:
+    count = None
+
+    @staticmethod
+    def get_count():
+        if Counter.count is None:  # memoize
+            Counter.count = 0
+        return Counter.count
+
+    @staticmethod
+    def increment_count():
+        if Counter.count is None:
+            Counter.count = 0
+        Counter.count += 1
+        return Counter.count
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
-import json
 import typing
 import logging
-import paho.mqtt.client as mqtt
 
 from call_next_func import post_update
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
+from codec import decode_payload, input_attribute
+from publisher import publish_release, QOS, PER_UAV_TOPICS, AGGREGATE_TOPIC
 
 # Set up Python logger. milliseconds are not supported by default
 logging.basicConfig(
@@ -22,35 +22,19 @@ for handler in logging.getLogger().handlers:  # Apply the custom formatter to th
 # Initialize the OpenTelemetry tracer
 tracer = TracerInitializer("release").tracer
 
-# Set up MQTT client
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        print("Connected to MQTT Broker!")
-    else:
-        print("Failed to connect, return code %d\n", rc)
 
-
-HOST = "172.17.0.1"  # TODO: import from ENV
-PORT = 1883
-QOS = 1  # At least once delivery
-CLIENT = mqtt.Client()
-CLIENT.on_connect = on_connect
-CLIENT.connect(HOST, PORT, 60)
-CLIENT.loop_start()  # Start the loop in a separate thread. it was needed on raspberry to publishes work
-
-
-def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
     """
     input: trajectories needed to be released and update
-    output: publishes the data to the '/release' topic, and calls the update function
+    output: publishes the data to the 'releases/<uav_id>' topics, and calls the update function
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[release fn] invoke count: {str(Counter.get_count())}')
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[release fn] Parsed input: {parsed_input}')
 
             data = parsed_input.get('data', [])
@@ -61,14 +45,12 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
             mutated_data = list(filter(lambda item: item.get('origin', None) == 'mutate', data))
             logger.debug(f'[release fn] Mutated data to release: {mutated_data}')
 
-        # Publish the trajectories to the 'release' topic
+        # Publish the trajectories to the 'releases/<uav_id>' topics
         with tracer.start_as_current_span('publish_release') as pub_span:
             pub_span.set_attribute("QoS", QOS)
-            result, mid = CLIENT.publish('releases', json.dumps(mutated_data), qos=QOS)
-            if result == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f'[release fn] Published mutated_data to releases topic: {mutated_data}')
-            else:
-                logger.error(f'[release fn] Failed to publish to releases topic, result code: {result}')
+            pub_span.set_attribute("per_uav_topics", PER_UAV_TOPICS)
+            pub_span.set_attribute("aggregate_topic", AGGREGATE_TOPIC)
+            publish_release(mutated_data)
 
         # call update function
         with tracer.start_as_current_span('post_update') as post_update_span:
@@ -0,0 +1,60 @@
+import os
+import json
+import logging
+import paho.mqtt.client as mqtt
+
+from codec import json_default
+
+logger = logging.getLogger(__name__)
+
+
+# Set up MQTT client
+def on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        print("Connected to MQTT Broker!")
+    else:
+        print("Failed to connect, return code %d\n", rc)
+
+
+HOST = "172.17.0.1"  # TODO: import from ENV
+PORT = 1883
+QOS = 1  # At least once delivery
+RELEASES_TOPIC = 'releases'
+# one message per released UAV on releases/<uav_id>, so that a UAV only receives (and parses) its own trajectory
+PER_UAV_TOPICS = os.getenv("RELEASE_PER_UAV_TOPICS", "true").lower() == "true"
+# the whole released set on RELEASES_TOPIC too, for consumers that want every release
+AGGREGATE_TOPIC = os.getenv("RELEASE_AGGREGATE_TOPIC", "false").lower() == "true"
+CLIENT = mqtt.Client()
+CLIENT.on_connect = on_connect
+CLIENT.connect(HOST, PORT, 60)
+CLIENT.loop_start()  # Start the loop in a separate thread. it was needed on raspberry to publishes work
+
+
+def uav_topic(uav_id):
+    return f'{RELEASES_TOPIC}/{uav_id}'
+
+
+def publish(topic, payload):
+    result, mid = CLIENT.publish(topic, json.dumps(payload, default=json_default), qos=QOS)
+    if result == mqtt.MQTT_ERR_SUCCESS:
+        logger.info(f'[release fn] Published to {topic} topic: {payload}')
+    else:
+        logger.error(f'[release fn] Failed to publish to {topic} topic, result code: {result}')
+    return result
+
+
+def publish_release(mutated_data):
+    """
+    Publish the released trajectories: each one to the releases/<uav_id> topic of its UAV (PER_UAV_TOPICS) and/or
+    the whole list to the releases topic (AGGREGATE_TOPIC).
+    Shared by the release function and the fused pipeline function.
+
+    Returns:
+        the paho result code, mqtt.MQTT_ERR_SUCCESS once every message is queued, else the first failure
+    """
+    results = []
+    if PER_UAV_TOPICS:
+        results.extend(publish(uav_topic(trajectory['uav_id']), trajectory) for trajectory in mutated_data)
+    if AGGREGATE_TOPIC or not PER_UAV_TOPICS:
+        results.append(publish(RELEASES_TOPIC, mutated_data))
+    return next((result for result in results if result != mqtt.MQTT_ERR_SUCCESS), mqtt.MQTT_ERR_SUCCESS)
@@ -0,0 +1,80 @@
+import time
+import uuid
+import threading
+
+
+class Batch:
+    """
+    Triggers collapsed into one detection run. They all share request_id.
+    """
+    __slots__ = ("request_id", "triggers", "uav_ids", "reports")
+
+    def __init__(self):
+        self.request_id = str(uuid.uuid4())
+        self.triggers = 0
+        self.uav_ids = set()
+        self.reports = {}  # uav_id -> created_at of the reports of the batch, as received in meta
+
+    def add(self, uav_id, reports):
+        self.triggers += 1
+        self.uav_ids.add(uav_id)
+        for reporter, created_at in (reports or {}).items():  # the latest report of each UAV
+            if reporter not in self.reports or created_at > self.reports[reporter]:
+                self.reports[reporter] = created_at
+
+    def single_uav_id(self):
+        """
+        Returns:
+            the reporting uav_id if every trigger of the batch came from the same UAV, None otherwise
+        """
+        if len(self.uav_ids) == 1:
+            return next(iter(self.uav_ids))
+        return None
+
+
+class Coalescer:
+    """
+    Coalescing window of the trigger function. The first trigger that finds no open batch opens one and
+    becomes its leader: it waits for the window, closes the batch and runs the detection once for all of them.
+    Triggers arriving while the batch is open join it and return right away.
+    A window of 0 disables coalescing, every trigger then leads its own batch.
+    """
+
+    def __init__(self, window):
+        self.window = window  # seconds
+        self._open = None
+        self._lock = threading.Lock()  # tinyFaaS serves invocations from a thread per request
+
+    def join(self, uav_id, reports=None):
+        """
+        Args:
+            reports: uav_id -> created_at of the reports behind the trigger (meta 'reported_at')
+
+        Returns:
+            (batch, leader): the batch the trigger joined, and True if the caller has to run it
+        """
+        if self.window <= 0:
+            batch = Batch()
+            batch.add(uav_id, reports)
+            return batch, True
+        with self._lock:
+            leader = self._open is None
+            if leader:
+                self._open = Batch()
+            batch = self._open
+            batch.add(uav_id, reports)
+            return batch, leader
+
+    def wait_and_close(self, batch):
+        """
+        Leader side: wait until the end of the window, then close the batch so that later triggers open a new one.
+
+        Returns:
+            the closed batch, no other trigger joins it afterwards
+        """
+        if self.window > 0:
+            time.sleep(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+        return batch
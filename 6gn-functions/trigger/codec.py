@@ -0,0 +1,87 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+try:
+    import msgpack
+except ImportError:  # JSON only
+    msgpack = None
+try:
+    from bson import ObjectId
+except ImportError:  # pymongo is only installed where MongoDB is read
+    ObjectId = None
+
+# encoding of the calls to the next function: 'msgpack' (binary, typed timestamps) or 'json'
+# every function reads both, selected by the Content-Type of the request; the ingester and external callers send JSON
+PAYLOAD_ENCODING = os.getenv("PAYLOAD_ENCODING", "msgpack")
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+JSON_CONTENT_TYPE = "application/json"
+
+logger = logging.getLogger(__name__)
+
+if PAYLOAD_ENCODING == 'msgpack' and msgpack is None:
+    logger.warning('[codec] msgpack is not installed, calling the next function with JSON')
+    PAYLOAD_ENCODING = 'json'
+
+
+def json_default(o):
+    # ObjectId type from MongoDB is not JSON serializable by default, neither is a datetime python object
+    if ObjectId is not None and isinstance(o, ObjectId):
+        return str(o)
+    elif isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def _msgpack_default(o):
+    if isinstance(o, datetime):
+        # naive datetimes are UTC, as MongoDB reads them
+        return msgpack.Timestamp.from_datetime(o if o.tzinfo is not None else o.replace(tzinfo=timezone.utc))
+    return json_default(o)
+
+
+def content_type(headers):
+    """
+    Returns:
+        the media type of the request, without parameters (e.g. '; charset=utf-8')
+    """
+    for key, value in (headers or {}).items():
+        if key.lower() == 'content-type':
+            return value.split(';')[0].strip().lower()
+    return JSON_CONTENT_TYPE
+
+
+def decode_payload(input, headers):
+    """
+    Parse a request body according to its Content-Type: MessagePack (bytes, timestamps as UTC datetimes) from the
+    chained functions, JSON otherwise.
+    """
+    if content_type(headers) in (MSGPACK_CONTENT_TYPE, 'application/x-msgpack'):
+        if msgpack is None:
+            raise ValueError('MessagePack payload received but msgpack is not installed')
+        return msgpack.unpackb(input, timestamp=3)
+    return json.loads(input)
+
+
+def encode_payload(payload):
+    """
+    Encode a payload for the next function with PAYLOAD_ENCODING. datetime and ObjectId values are encoded here,
+    the documents do not need to be converted beforehand.
+
+    Returns:
+        (content_type, body)
+    """
+    if PAYLOAD_ENCODING == 'msgpack':
+        return MSGPACK_CONTENT_TYPE, msgpack.packb(payload, default=_msgpack_default)
+    return JSON_CONTENT_TYPE, json.dumps(payload, default=json_default).encode('utf-8')
+
+
+def input_attribute(input):
+    """
+    Returns:
+        the request body as a span attribute, binary bodies are summarized
+    """
+    if isinstance(input, (bytes, bytearray)):
+        return f'<{len(input)} bytes {MSGPACK_CONTENT_TYPE}>'
+    return input
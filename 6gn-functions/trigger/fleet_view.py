@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import PyMongoError
+
+from mongo_client import get_database
+
+FLEET_VIEW_MAX_BACKOFF = float(os.getenv("FLEET_VIEW_MAX_BACKOFF", "30"))  # seconds between reconnection attempts
+
+logger = logging.getLogger(__name__)
+
+_fleet_view = None
+_fleet_view_lock = threading.Lock()
+
+
+class FleetView:
+    """
+    In-memory map of uav_id -> latest trajectory, kept by a warm trigger container.
+    A background thread opens a change stream on sixGNext.trajectories, loads a snapshot of the current fleet
+    (with the regular query), then applies every inserted trajectory. Trajectories older than ttl are evicted.
+    Until the snapshot is loaded, whenever the stream is down, and while the stream has not delivered the
+    report that caused the trigger yet, recent() returns None and the caller queries MongoDB instead.
+    """
+
+    def __init__(self, load_snapshot, ttl, fields):
+        self.ttl = ttl  # seconds a trajectory is kept
+        self.fields = fields  # fields kept from every inserted document
+        self._load_snapshot = load_snapshot  # callable(seconds_ago) -> list of the latest trajectories
+        self._trajectories = {}
+        self._lock = threading.Lock()  # tinyFaaS serves invocations from a thread per request
+        self._caught_up = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fleet-view', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            try:
+                # the stream is opened before the snapshot is read, so no insert falls in between
+                with get_database().trajectories.watch([{'$match': {'operationType': 'insert'}}]) as stream:
+                    snapshot = self._load_snapshot(self.ttl)
+                    with self._lock:
+                        self._trajectories = {}
+                        for trajectory in snapshot:
+                            self._keep(trajectory)
+                    self._caught_up.set()
+                    logger.info(f'[trigger fn] fleet view caught up with {len(snapshot)} UAVs')
+                    backoff = 1.0
+                    for change in stream:
+                        with self._lock:
+                            self._keep(change['fullDocument'])
+            except PyMongoError as e:  # e.g. no replica set (change streams need one), or the server went away
+                logger.error(f'[trigger fn] fleet view change stream failed, retrying in {backoff}s: {e}')
+            self._caught_up.clear()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, FLEET_VIEW_MAX_BACKOFF)
+
+    def _keep(self, document):
+        # callers hold self._lock
+        current = self._trajectories.get(document['uav_id'])
+        if current is None or document['created_at'] >= current['created_at']:
+            self._trajectories[document['uav_id']] = {field: document[field] for field in self.fields
+                                                      if field in document}
+
+    def recent(self, seconds_ago, reports=None):
+        """
+        Args:
+            reports: uav_id -> created_at of the reports that caused the trigger (see report_time), the view
+                is only used once it holds each of them
+
+        Returns:
+            copies of the latest trajectories newer than seconds_ago, or None if the view is not caught up
+        """
+        if not self._caught_up.is_set():
+            return None
+        now = datetime.now()
+        eviction, threshold = now - timedelta(seconds=self.ttl), now - timedelta(seconds=seconds_ago)
+        with self._lock:
+            for uav_id, created_at in (reports or {}).items():
+                current = self._trajectories.get(uav_id)
+                if current is None or current['created_at'] < report_time(created_at):
+                    logger.info(f'[trigger fn] fleet view has not received the report of UAV {uav_id} yet')
+                    return None
+            for uav_id in [uav_id for uav_id, trajectory in self._trajectories.items()
+                           if trajectory['created_at'] < eviction]:
+                del self._trajectories[uav_id]
+            # copies, callers may modify them
+            return [dict(trajectory) for trajectory in self._trajectories.values()
+                    if trajectory['created_at'] >= threshold]
+
+
+def report_time(created_at):
+    """
+    created_at of a report as the change stream delivers it: naive, truncated to milliseconds (BSON dates).
+    The report time comes from update in meta, as a datetime (msgpack, UTC-labelled) or an ISO string (JSON).
+    """
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is not None:  # the naive wall-clock time of update, labelled UTC by the codec
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+
+
+def get_fleet_view(load_snapshot, ttl, fields):
+    """
+    FleetView of the container, created and started on first use.
+    """
+    global _fleet_view
+    with _fleet_view_lock:
+        if _fleet_view is None:
+            _fleet_view = FleetView(load_snapshot, ttl, fields)
+            _fleet_view.start()
+        return _fleet_view
@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 
-import json
+import os
 import typing
 import logging
-import uuid
 
 from call_next_func import post_collision_detector
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
-from get_recent_trajectories import get_recent_trajectories
-from json_encoder import JSONEncoder
+from codec import decode_payload, input_attribute
+from get_recent_trajectories import get_recent_trajectories, TRAJECTORY_QUERY, LATEST_POSITIONS, FLEET_VIEW
+from mongo_client import get_database
+from schema import bootstrap_schema
+from coalescer import Coalescer
 
 # Set up Python logger. milliseconds are not supported by default
 logging.basicConfig(
@@ -25,19 +27,25 @@ for handler in logging.getLogger().handlers:  # Apply the custom formatter to th
 tracer = TracerInitializer("trigger").tracer
 
 TTL = 100  # seconds
+# triggers arriving within this window share one request_id and one collision-detector call, 0 (default) disables it
+COALESCE_WINDOW_MS = int(os.getenv("COALESCE_WINDOW_MS", "0"))
 
-def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
+coalescer = Coalescer(COALESCE_WINDOW_MS / 1000)
+
+bootstrap_schema(get_database())  # cold start: make sure the trajectories indexes exist
+
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]:
     """
     input: gets a new trajectory. Invoked by the update function
     output: calls the risk-eval function with the recent trajectories from the db
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[trigger fn] invoke count: {str(Counter.get_count())}')
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[trigger fn] Parsed input: {parsed_input}')
 
             # data = parsed_input.get('data', []) # no data expected
@@ -58,20 +66,35 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
             main_span.set_attribute("error_details", "Origin is not self_report")
             return f'Origin is not self_report. dump: {meta}'
 
-        # Generate a unique request_id and add it to the meta dictionary
-        with tracer.start_as_current_span('gen_req_uid') as gen_req_uid_span:
-            request_id = str(uuid.uuid4())
-            meta['request_id'] = request_id
-            logger.info(f'[trigger fn] Generated request_id: {request_id}')
-            gen_req_uid_span.set_attribute("request_id", request_id)
+        # Join the open coalescing window, or open one. Its leader generates the request_id shared by the whole batch
+        with tracer.start_as_current_span('gen_req_uid', attributes={"coalesce_window_ms": COALESCE_WINDOW_MS}) as gen_req_uid_span:
+            batch, leader = coalescer.join(meta.get('uav_id'), meta.pop('reported_at', None))
+            gen_req_uid_span.set_attribute("request_id", batch.request_id)
+            gen_req_uid_span.set_attribute("leader", leader)
+            if not leader:
+                logger.info(f'[trigger fn] Coalesced into request_id: {batch.request_id}')
+                return f'Coalesced into request_id: {batch.request_id}'
+            coalescer.wait_and_close(batch)
+            meta['request_id'] = batch.request_id
+            # collision-detector re-checks only the reporting UAV if there is exactly one (incremental mode)
+            uav_id = batch.single_uav_id()
+            if uav_id is not None:
+                meta['uav_id'] = uav_id
+            else:
+                meta.pop('uav_id', None)
+            gen_req_uid_span.set_attribute("coalesced_triggers", batch.triggers)
+            main_span.set_attribute("coalesced_triggers", batch.triggers)
+            logger.info(f'[trigger fn] Generated request_id: {batch.request_id} for {batch.triggers} trigger(s)')
+
+        bootstrap_schema(get_database())  # no-op once done, retried with backoff after a failed attempt
 
         # TODO: get the ttl from ENV
         # TODO: if db is slow, call it in parallel with previous code
         # Get recent trajectory from each uav (limited by ttl, in seconds)
         # includes the trajectory from the update (already in db)
-        with tracer.start_as_current_span('get_recent_trajectories', attributes={"ttl": TTL}) as get_recent_trajectories_span:
+        with tracer.start_as_current_span('get_recent_trajectories', attributes={"ttl": TTL, "query": TRAJECTORY_QUERY, "latest_positions": LATEST_POSITIONS, "fleet_view": FLEET_VIEW}) as get_recent_trajectories_span:
             try:
-                recent_trajectories = get_recent_trajectories(TTL)
+                recent_trajectories = get_recent_trajectories(TTL, batch.reports)
             except Exception as e:
                 logger.error(f'[trigger fn] Error in get_recent_trajectories: {e}')
                 get_recent_trajectories_span.set_attribute("error", True)
@@ -91,16 +114,14 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
                     f'[trigger fn] Found {len(recent_trajectories)} trajectories for uav_ids: {[trajectory["uav_id"] for trajectory in recent_trajectories]}')
                 # call risk-eval function
                 with tracer.start_as_current_span('post_risk_eval') as post_risk_eval_span:
-                    with tracer.start_as_current_span('json_encode_recent_trajectories'):
-                        encoded_recent_trajectories = [JSONEncoder().default(trajectory) for trajectory in recent_trajectories]
-                    try:
-                        r = post_collision_detector(encoded_recent_trajectories, meta)
+                    try:  # created_at and _id are encoded with the payload, see codec.py
+                        r = post_collision_detector(recent_trajectories, meta)
                         post_risk_eval_span.set_attribute("response_code", r.status_code)
                     except Exception as e:
                         logger.error(f'[trigger fn] Error in post_risk_eval: {e}')
                         post_risk_eval_span.set_attribute("error", True)
                         post_risk_eval_span.set_attribute("error_details", e)
-                    return str(encoded_recent_trajectories)
+                    return str(recent_trajectories)
 
 
 class Counter:
@@ -1,14 +1,108 @@
-from pymongo import MongoClient
+import os
+import logging
 from datetime import datetime, timedelta
 
+from pymongo.errors import ConnectionFailure
 
-def get_recent_trajectories(seconds_ago):
-    # Create a MongoClient to the running MongoDB instance
-    host = "172.17.0.1"  # TODO use ENV variables
-    client = MongoClient(f'mongodb://{host}:27017/')
+from mongo_client import get_database, reconnect
+from fleet_view import get_fleet_view
+from schema import TRAJECTORY_STORAGE
 
-    # Access the 'trajectories' collection in the 'sixGNext' database
-    db = client.sixGNext
+logger = logging.getLogger(__name__)
+
+# 'aggregate' reduces to the latest trajectory per uav_id on the server, 'find' streams every recent report
+TRAJECTORY_QUERY = os.getenv("TRAJECTORY_QUERY", "aggregate")
+# read the latest_positions collection maintained by update, the history query above is the fallback
+LATEST_POSITIONS = os.getenv("LATEST_POSITIONS", "true").lower() == "true"
+# answer from an in-memory view fed by a change stream (needs a replica set), queries are the fallback
+FLEET_VIEW = os.getenv("FLEET_VIEW", "false").lower() == "true"
+if FLEET_VIEW and TRAJECTORY_STORAGE == 'timeseries':
+    # change streams cannot be opened on a time-series collection
+    logger.warning('[trigger fn] FLEET_VIEW is not supported with TRAJECTORY_STORAGE=timeseries, disabled')
+    FLEET_VIEW = False
+
+# fields collision-detector (and mutate/release downstream) read from a trajectory, every mode (and the fleet
+# view) returns these and only these. _id is left out: store_update drops it when the trajectory is stored again
+TRAJECTORY_FIELDS = ("uav_id", "uav_type", "latitude", "longitude", "altitude", "speed", "direction",
+                     "vertical_speed", "created_at", "origin", "mutation_cases")
+TRAJECTORY_PROJECTION = {'_id': 0, **{field: 1 for field in TRAJECTORY_FIELDS}}
+
+
+def get_recent_trajectories(seconds_ago, reports=None):
+    """
+    Args:
+        reports: uav_id -> created_at of the reports that caused the trigger, so that the fleet view is not
+            used before it holds them (see FleetView.recent)
+    """
+    if FLEET_VIEW:
+        recent_trajectories = get_fleet_view(_get_recent_trajectories, seconds_ago,
+                                             TRAJECTORY_FIELDS).recent(seconds_ago, reports)
+        if recent_trajectories is not None:
+            return recent_trajectories
+        logger.info('[trigger fn] fleet view not caught up yet, querying MongoDB')
+    try:
+        return _get_recent_trajectories(seconds_ago)
+    except ConnectionFailure as e:
+        # the pooled client may hold connections to a restarted server, retry once on a fresh one
+        logger.error(f'[trigger fn] MongoDB connection failure, reconnecting: {e}')
+        reconnect()
+        return _get_recent_trajectories(seconds_ago)
+
+
+def _get_recent_trajectories(seconds_ago):
+    if LATEST_POSITIONS:
+        recent_trajectories = _latest_positions(seconds_ago)
+        if recent_trajectories:
+            return recent_trajectories
+        # empty: update does not maintain latest_positions (yet), or nothing was reported within the ttl
+        logger.info('[trigger fn] no recent document in latest_positions, falling back to the history query')
+    return _history_trajectories(seconds_ago)
+
+
+def _latest_positions(seconds_ago):
+    """
+    Latest trajectory of each uav_id newer than seconds_ago, read from the one-document-per-UAV latest_positions
+    collection: O(active UAVs), no sort or group.
+    """
+    latest_positions = get_database().latest_positions
+    ttl = datetime.now() - timedelta(seconds=seconds_ago)
+    return list(latest_positions.find({'created_at': {'$gte': ttl}}, TRAJECTORY_PROJECTION))
+
+
+def _history_trajectories(seconds_ago):
+    if TRAJECTORY_QUERY == 'aggregate':
+        return _aggregate_recent_trajectories(seconds_ago)
+    elif TRAJECTORY_QUERY == 'find':
+        return _find_recent_trajectories(seconds_ago)
+    raise ValueError(f'Unknown trajectory query: {TRAJECTORY_QUERY}')
+
+
+def _aggregate_recent_trajectories(seconds_ago):
+    """
+    Latest trajectory of each uav_id newer than seconds_ago, reduced by an aggregation pipeline on the server,
+    so that transfer and Python iteration scale with the number of UAVs instead of the number of reports.
+    On a time-series collection the sort is on (uav_id, created_at desc): with the matching index the server
+    answers this "last point" query reading the newest bucket of each UAV instead of every recent report.
+    """
+    trajectories = get_database().trajectories
+    ttl = datetime.now() - timedelta(seconds=seconds_ago)
+
+    fields = [field for field in TRAJECTORY_FIELDS if field != 'uav_id']
+    pipeline = [
+        {'$match': {'created_at': {'$gte': ttl}}},
+        # newest first, so $first below picks the latest report
+        {'$sort': {'uav_id': 1, 'created_at': -1} if TRAJECTORY_STORAGE == 'timeseries' else {'created_at': -1}},
+        {'$group': {'_id': '$uav_id', **{field: {'$first': f'${field}'} for field in fields}}},
+        # $first yields null for a field the report does not have (e.g. mutation_cases), drop it as find does
+        {'$project': {'_id': 0, 'uav_id': '$_id',
+                      **{field: {'$ifNull': [f'${field}', '$$REMOVE']} for field in fields}}},
+    ]
+    return list(trajectories.aggregate(pipeline, allowDiskUse=True))
+
+
+def _find_recent_trajectories(seconds_ago):
+    # Access the 'trajectories' collection in the 'sixGNext' database, through the pooled client
+    db = get_database()
     trajectories = db.trajectories
 
     # Get the current time and calculate the time ttl seconds ago
@@ -16,7 +110,7 @@ def get_recent_trajectories(seconds_ago):
     ttl = now - timedelta(seconds=seconds_ago)
 
     # Query the 'trajectories' collection for documents where 'created_at' is not older than ttl seconds
-    recent_trajectories = trajectories.find({'created_at': {'$gte': ttl}})
+    recent_trajectories = trajectories.find({'created_at': {'$gte': ttl}}, TRAJECTORY_PROJECTION)
 
     # Create a dictionary to store the most recent trajectory of each 'uav_id'
     recent_uav_trajectories = {}
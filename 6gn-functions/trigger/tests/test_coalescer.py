@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from coalescer import Coalescer  # noqa: E402
+
+
+class TestCoalescer(unittest.TestCase):
+
+    def test_window_of_zero_leads_every_trigger(self):
+        coalescer = Coalescer(0)
+        first, first_leader = coalescer.join('1')
+        second, second_leader = coalescer.join('1')
+        self.assertTrue(first_leader and second_leader)
+        self.assertNotEqual(first.request_id, second.request_id)
+        self.assertEqual(coalescer.wait_and_close(first).triggers, 1)
+
+    def test_followers_join_the_open_batch(self):
+        coalescer = Coalescer(0.05)
+        batch, leader = coalescer.join('1')
+        followers = [coalescer.join(uav_id) for uav_id in ('2', '2')]
+        self.assertTrue(leader)
+        self.assertTrue(all(joined is batch and not follower_leads for joined, follower_leads in followers))
+        coalescer.wait_and_close(batch)
+        self.assertEqual(batch.triggers, 3)
+        self.assertIsNone(batch.single_uav_id())
+
+        # the window is closed, the next trigger leads a new batch
+        later, leader = coalescer.join('1')
+        self.assertTrue(leader)
+        self.assertIsNot(later, batch)
+        self.assertEqual(coalescer.wait_and_close(later).single_uav_id(), '1')
+
+    def test_concurrent_triggers_elect_one_leader(self):
+        coalescer = Coalescer(0.1)
+        joined = []
+        threads = [threading.Thread(target=lambda uav_id=str(index): joined.append(coalescer.join(uav_id)))
+                   for index in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(leader for _, leader in joined), 1)
+        self.assertEqual(len({batch.request_id for batch, _ in joined}), 1)
+        self.assertEqual(joined[0][0].triggers, 20)
+
+    def test_batch_keeps_the_latest_report_of_each_uav(self):
+        coalescer = Coalescer(0.05)
+        now = datetime.now()
+        batch, _ = coalescer.join('1', {'1': now})
+        coalescer.join('1', {'1': now - timedelta(seconds=1)})
+        coalescer.join('2', {'2': now})
+        self.assertEqual(coalescer.wait_and_close(batch).reports, {'1': now, '2': now})
+
+
+if __name__ == '__main__':
+    unittest.main()
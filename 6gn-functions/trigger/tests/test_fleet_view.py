@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fleet_view import FleetView, report_time  # noqa: E402
+
+
+class TestFleetView(unittest.TestCase):
+
+    def setUp(self):
+        # the background thread is not started, the view is filled by hand
+        self.view = FleetView(lambda seconds_ago: [], 100, ('uav_id', 'created_at'))
+        self.reported = datetime.now().replace(microsecond=123456)
+        self.stored = self.reported.replace(microsecond=123000)  # BSON dates are in milliseconds
+        self.view._keep({'uav_id': '1', 'created_at': self.stored, 'speed': 10})
+
+    def test_not_used_before_the_snapshot(self):
+        self.assertIsNone(self.view.recent(100))
+
+    def test_used_once_it_holds_the_report(self):
+        self.view._caught_up.set()
+        expected = [{'uav_id': '1', 'created_at': self.stored}]
+        self.assertEqual(self.view.recent(100), expected)
+        self.assertEqual(self.view.recent(100, {'1': self.reported}), expected)
+        self.assertEqual(self.view.recent(100, {'1': self.reported.isoformat()}), expected)  # JSON payload
+        self.assertEqual(self.view.recent(100, {'1': self.reported.replace(tzinfo=timezone.utc)}), expected)  # msgpack
+
+    def test_not_used_while_the_report_is_missing(self):
+        self.view._caught_up.set()
+        self.assertIsNone(self.view.recent(100, {'1': self.reported + timedelta(seconds=1)}))
+        self.assertIsNone(self.view.recent(100, {'2': self.reported}))
+
+    def test_report_time_matches_the_stored_date(self):
+        self.assertEqual(report_time(self.reported.isoformat()), self.stored)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import sys
+import time
+import atexit
+import signal
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """
+    Write-behind buffer shared by the concurrent invocations of a warm update container.
+    Documents are collected and handed to write_batch (one unordered bulk insert) by a background thread
+    as soon as max_batch documents are buffered or max_delay seconds passed since the oldest one.
+    Every submit returns a ticket; wait(ticket) is the barrier for callers that need their write to be
+    visible (the self_report path, before trigger reads the fleet): it asks for an immediate flush and
+    blocks until the batch holding the ticket is written. Tickets submitted with barrier=True (and the
+    ticket flush() waits on) keep the outcome of their batch until every waiter registered on them has
+    collected it, so a failed write is never reported as persisted.
+    """
+
+    def __init__(self, write_batch, max_batch, max_delay):
+        self.max_batch = max_batch
+        self.max_delay = max_delay  # seconds
+        self._write_batch = write_batch  # callable(list of documents), raises on failure
+        self._buffer = []
+        self._oldest = None  # monotonic time of the oldest buffered document
+        self._submitted = 0  # tickets handed out, the ticket of a document is its rank in submission order
+        self._written = 0  # every ticket up to this one went through write_batch
+        self._barriers = {}  # ticket -> number of waiters registered on it, until its batch is written
+        self._failures = {}  # ticket -> [write error, waiters that did not collect it yet], for failed batches
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()  # tinyFaaS serves invocations from a thread per request
+        self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, documents, barrier=False):
+        """
+        Args:
+            barrier: True if the caller will wait() on the ticket; its write error is then kept for wait()
+
+        Returns:
+            ticket of the last document, to pass to wait()
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('BatchWriter is closed')
+            first = not self._buffer
+            if first:
+                self._oldest = time.monotonic()
+            self._buffer.extend(documents)
+            self._submitted += len(documents)
+            if barrier:
+                self._register(self._submitted)
+            if first or len(self._buffer) >= self.max_batch:
+                self._condition.notify_all()  # start the delay timer, or flush a full batch
+            return self._submitted
+
+    def wait(self, ticket, timeout=None):
+        """
+        Flush-before-trigger barrier: block until the document with this ticket is written.
+        Raises the write error if its batch failed, TimeoutError if it is not written within timeout seconds.
+        The outcome is only known for a ticket submitted with barrier=True, each registered waiter collects it once.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if self._written < ticket:
+                self._flush_requested = True
+                self._condition.notify_all()
+            while self._written < ticket:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._unregister(ticket)  # this waiter will not collect the outcome
+                    raise TimeoutError(f'document {ticket} not written within {timeout}s')
+                self._condition.wait(remaining)
+            failure = self._failures.get(ticket)
+            if failure is not None:
+                failure[1] -= 1
+                if failure[1] <= 0:
+                    del self._failures[ticket]
+                raise failure[0]
+
+    def flush(self):
+        """
+        Write everything submitted so far.
+        Raises the write error if the batch holding the last submitted document failed.
+        """
+        with self._condition:
+            ticket = self._submitted
+            if self._written >= ticket:
+                return
+            self._register(ticket)  # on top of the submitter of that ticket, if it waits on it too
+        self.wait(ticket)
+
+    def close(self):
+        """
+        Flush and stop the background thread. Idempotent, called on shutdown.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _register(self, ticket):
+        # callers hold self._condition
+        self._barriers[ticket] = self._barriers.get(ticket, 0) + 1
+
+    def _unregister(self, ticket):
+        # callers hold self._condition
+        waiters = self._barriers.pop(ticket, 0) - 1
+        if waiters > 0:
+            self._barriers[ticket] = waiters
+
+    def _due(self):
+        # callers hold self._condition
+        return self._buffer and (self._closed or self._flush_requested or len(self._buffer) >= self.max_batch
+                                 or time.monotonic() - self._oldest >= self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._due():
+                    if self._closed:
+                        return
+                    timeout = None if not self._buffer else max(0.0, self._oldest + self.max_delay - time.monotonic())
+                    self._condition.wait(timeout)
+                batch, self._buffer = self._buffer, []
+                self._flush_requested = False
+                first, last = self._written + 1, self._written + len(batch)
+
+            error = None
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f'[update fn] Error writing a batch of {len(batch)} documents: {e}')
+                error = e
+
+            with self._condition:
+                settled = [ticket for ticket in self._barriers if first <= ticket <= last]
+                for ticket in settled:
+                    waiters = self._barriers.pop(ticket)
+                    if error is not None:
+                        self._failures[ticket] = [error, waiters]  # kept until each waiter collects it
+                self._written = last
+                self._condition.notify_all()
+
+
+def install_shutdown_hooks(writer):
+    """
+    Flush the writer when the process exits, including on SIGTERM (docker stop), which skips atexit by default.
+    """
+    atexit.register(writer.close)
+    if threading.current_thread() is not threading.main_thread():
+        return  # signal handlers can only be set from the main thread
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        writer.close()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            sys.exit(0)
+    signal.signal(signal.SIGTERM, on_sigterm)
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
-import json
 import typing
 import logging
 
 from call_next_func import post_trigger
 from timestamp_for_logger import CustomFormatter
 from tracer import TracerInitializer
-from store_update import store_update
+from codec import decode_payload, input_attribute
+from store_update import store_update, wait_for_store
 from json_encoder import JSONEncoder
 
 # Set up Python logger. milliseconds are not supported by default
@@ -23,18 +23,18 @@ for handler in logging.getLogger().handlers:  # Apply the custom formatter to th
 # Initialize the OpenTelemetry tracer
 tracer = TracerInitializer("update").tracer
 
-def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]: # NOTE: should not be parallelized with postTrigger, as it will read the write update() does
+def fn(input: typing.Optional[typing.Union[str, bytes]], headers: typing.Optional[typing.Dict[str, str]]) -> typing.Optional[str]: # NOTE: should not be parallelized with postTrigger, as it will read the write update() does
     """
     input: A JSON string of collection of new trajectories
     output: writes to the db, and may call trigger function
     """
     with tracer.start_as_current_span('fn') as main_span:
         main_span.set_attribute("invoke_count", Counter.increment_count())
-        main_span.set_attribute("input", input)
+        main_span.set_attribute("input", input_attribute(input))
         logger.info(f'[update fn] invoke count: {str(Counter.get_count())}')
         # Parse the JSON string into a Python list of dictionaries
         with tracer.start_as_current_span('parse_input'):
-            parsed_input = json.loads(input)
+            parsed_input = decode_payload(input, headers)  # msgpack or JSON, by Content-Type
             logger.debug(f'[update fn] Parsed input: {parsed_input}')
 
             data = parsed_input.get('data', [])
@@ -61,12 +61,26 @@ def fn(input: typing.Optional[str], headers: typing.Optional[typing.Dict[str, st
                     store_n_decide_span.set_attribute("error_details", e)
             elif origin == 'self_report':  # invoked by ingest
                 logger.info('[update fn] storing the reported data.')
+                ticket = None
                 try: # NOTE: usually only one trajectory is reported, but data is a list
-                    store_update(data)   # IO operation
+                    ticket = store_update(data, barrier=True)   # IO operation (buffered when write-behind is enabled)
                 except Exception as e:
                     logger.error(f'[update fn] Error in store_update: {e}')
                     store_n_decide_span.set_attribute("error", True)
                     store_n_decide_span.set_attribute("error_details", e)
+                # trigger reads the fleet from the db, so the report has to be written first
+                with tracer.start_as_current_span('wait_for_store') as wait_for_store_span:
+                    try:
+                        wait_for_store(ticket)  # IO operation
+                    except Exception as e:
+                        logger.error(f'[update fn] Error in wait_for_store: {e}')
+                        wait_for_store_span.set_attribute("error", True)
+                        wait_for_store_span.set_attribute("error_details", e)
+                if len(data) == 1:  # lets collision-detector re-check only the reporting UAV (incremental mode)
+                    meta['uav_id'] = data[0].get('uav_id')
+                # the fleet view of trigger is only used once it holds these reports
+                meta['reported_at'] = {element.get('uav_id'): element['created_at'] for element in data
+                                  if 'created_at' in element}
                 logger.info('[update fn] Calling post_trigger with data and meta')
                 with tracer.start_as_current_span('post_trigger') as post_trigger_span:
                     # json_serialiized_data = JSONEncoder().encode(data)  # after adding created_at as python timestamp
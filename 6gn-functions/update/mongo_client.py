@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+import threading
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+MONGO_HOST = os.getenv("MONGO_HOST", "172.17.0.1")
+MONGO_PORT = int(os.getenv("MONGO_PORT", "27017"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))  # tinyFaaS runs a thread per request
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "1"))  # keep a warm connection between invocations
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "2000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "5000"))
+MONGO_HEALTH_CHECK_INTERVAL = float(os.getenv("MONGO_HEALTH_CHECK_INTERVAL", "30"))  # seconds between pings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_last_health_check = 0.0
+_lock = threading.Lock()
+
+
+def _create_client():
+    return MongoClient(f'mongodb://{MONGO_HOST}:{MONGO_PORT}/',
+                       maxPoolSize=MONGO_MAX_POOL_SIZE,
+                       minPoolSize=MONGO_MIN_POOL_SIZE,
+                       connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                       serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                       socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS)
+
+
+def check_health(client):
+    """
+    Returns:
+        True if the server answers a ping, False otherwise
+    """
+    try:
+        client.admin.command('ping')
+        return True
+    except PyMongoError as e:
+        logger.error(f'[mongo client] MongoDB health check failed: {e}')
+        return False
+
+
+def get_client():
+    """
+    Process-wide MongoClient, created lazily on first use and shared by every invocation of a warm container,
+    so that connection setup and server discovery are paid once instead of per trigger.
+    Every MONGO_HEALTH_CHECK_INTERVAL seconds one invocation pings the client, outside the lock, and replaces
+    it if the server does not answer.
+    """
+    global _client, _last_health_check
+    with _lock:
+        now = time.monotonic()
+        if _client is None:
+            logger.info(f'[mongo client] creating MongoClient to {MONGO_HOST}:{MONGO_PORT}')
+            _client = _create_client()  # no I/O here, MongoClient connects in the background
+            _last_health_check = now
+            return _client
+        client = _client
+        if now - _last_health_check < MONGO_HEALTH_CHECK_INTERVAL:
+            return client
+        _last_health_check = now  # this invocation runs the check, the others go on with the current client
+    if check_health(client):
+        return client
+    _replace(client)
+    return get_client()
+
+
+def reconnect():
+    """
+    Drop the current client, the next get_client() creates a fresh one.
+    """
+    with _lock:
+        stale = _client
+    _replace(stale)
+
+
+def _replace(stale):
+    """
+    Drop stale if it is still the current client (another invocation may have replaced it already).
+    stale is not closed: invocations still using it would fail with InvalidOperation, which the
+    ConnectionFailure retries do not catch. Its pool and monitor threads are released once it is collected.
+    """
+    global _client
+    with _lock:
+        if _client is stale:
+            _client = None
+
+
+def get_database():
+    # the 'sixGNext' database
+    return get_client().sixGNext
@@ -0,0 +1,164 @@
+import os
+import time
+import logging
+import threading
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+
+# retention of the trajectory history, enforced by a TTL index on created_at; 0 disables it
+TRAJECTORY_RETENTION_SECONDS = int(os.getenv("TRAJECTORY_RETENTION_SECONDS", "86400"))
+# per-UAV history index, for queries of one UAV over time (costs one more index update per insert)
+TRAJECTORY_UAV_INDEX = os.getenv("TRAJECTORY_UAV_INDEX", "false").lower() == "true"
+# 'collection' keeps the history in a plain collection, 'timeseries' in a MongoDB (5.0+) time-series collection
+# bucketed by uav_id; only applies when sixGNext.trajectories does not exist yet
+TRAJECTORY_STORAGE = os.getenv("TRAJECTORY_STORAGE", "collection")
+# bucketing of the time-series collection, 'seconds' is the finest preset and fits 50 Hz telemetry
+TRAJECTORY_GRANULARITY = os.getenv("TRAJECTORY_GRANULARITY", "seconds")
+SCHEMA_RETRY_MAX_BACKOFF = float(os.getenv("SCHEMA_RETRY_MAX_BACKOFF", "60"))  # seconds between bootstrap attempts
+
+INDEX_OPTIONS_CONFLICT = 85  # server error code: same index name or keys, different options
+
+logger = logging.getLogger(__name__)
+
+_bootstrapped = False
+_retry_at = 0.0  # time.monotonic() before which bootstrap_schema does not try again
+_backoff = 1.0
+_lock = threading.Lock()
+
+
+def ensure_indexes(db):
+    """
+    Idempotently create the indexes of sixGNext.trajectories:
+    - (created_at, uav_id) for the recent-window query of trigger
+    - (uav_id, created_at desc) if TRAJECTORY_UAV_INDEX is set, always on a time-series collection
+      where it serves the latest-per-UAV query
+    - a TTL index on created_at expiring documents after TRAJECTORY_RETENTION_SECONDS,
+      also set on sixGNext.latest_positions; a time-series collection expires whole buckets instead
+    created_at is stored as a naive datetime.now(), which the server reads as UTC, so the retention is exact
+    when the containers run in UTC and shifted by the local offset otherwise.
+    """
+    timeseries = ensure_trajectories_collection(db)
+    trajectories = db.trajectories
+    trajectories.create_index([('created_at', ASCENDING), ('uav_id', ASCENDING)], name='created_at_uav_id')
+    if TRAJECTORY_UAV_INDEX or timeseries:
+        trajectories.create_index([('uav_id', ASCENDING), ('created_at', DESCENDING)], name='uav_id_created_at')
+
+    if timeseries:
+        ensure_timeseries_retention(db, 'trajectories')
+    else:
+        ensure_ttl_index(db, 'trajectories')
+    # latest_positions holds one document per UAV ever seen, the same retention drops the ones gone silent
+    ensure_ttl_index(db, 'latest_positions')
+
+
+def ensure_trajectories_collection(db):
+    """
+    Create sixGNext.trajectories as a time-series collection if TRAJECTORY_STORAGE is 'timeseries' and it does
+    not exist yet. An existing plain collection cannot be converted in place, it is kept (and logged).
+
+    Returns:
+        True if sixGNext.trajectories is a time-series collection
+    """
+    if TRAJECTORY_STORAGE not in ('collection', 'timeseries'):
+        raise ValueError(f'Unknown trajectory storage: {TRAJECTORY_STORAGE}')
+    existing = next(db.list_collections(filter={'name': 'trajectories'}), None)
+    if existing is not None:
+        timeseries = existing.get('type') == 'timeseries'
+        if timeseries != (TRAJECTORY_STORAGE == 'timeseries'):
+            logger.warning(f'[schema] sixGNext.trajectories already exists as a {existing.get("type")}, '
+                           f'TRAJECTORY_STORAGE={TRAJECTORY_STORAGE} needs a new (empty) collection')
+        return timeseries
+    if TRAJECTORY_STORAGE == 'collection':
+        return False
+
+    options = {}
+    if TRAJECTORY_RETENTION_SECONDS > 0:
+        options['expireAfterSeconds'] = TRAJECTORY_RETENTION_SECONDS
+    try:
+        db.create_collection('trajectories',
+                             timeseries={'timeField': 'created_at', 'metaField': 'uav_id',
+                                         'granularity': TRAJECTORY_GRANULARITY},
+                             **options)
+        logger.info(f'[schema] created sixGNext.trajectories as a time-series collection ({TRAJECTORY_GRANULARITY})')
+    except CollectionInvalid:
+        pass  # created concurrently by another container
+    return True
+
+
+def ensure_timeseries_retention(db, collection_name):
+    """
+    Time-series collections do not take a TTL index on the time field: the retention is an option of the
+    collection, updated in place when TRAJECTORY_RETENTION_SECONDS changes, 'off' if it is 0.
+    """
+    db.command('collMod', collection_name,
+               expireAfterSeconds=TRAJECTORY_RETENTION_SECONDS if TRAJECTORY_RETENTION_SECONDS > 0 else 'off')
+
+
+def ensure_ttl_index(db, collection_name):
+    """
+    TTL index on created_at expiring documents after TRAJECTORY_RETENTION_SECONDS, dropped if the retention is 0.
+    An existing index on created_at alone is reused whatever its name: a TTL one gets the new retention in place,
+    a plain one is replaced by the TTL index.
+    """
+    collection = db[collection_name]
+    if TRAJECTORY_RETENTION_SECONDS > 0:
+        try:
+            collection.create_index([('created_at', ASCENDING)], name='created_at_ttl',
+                                    expireAfterSeconds=TRAJECTORY_RETENTION_SECONDS)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            name, index = created_at_index(collection)
+            if index is None:
+                raise  # the conflict is not on the created_at key
+            if 'expireAfterSeconds' in index:  # the TTL index exists with another retention, update it in place
+                db.command('collMod', collection_name,
+                           index={'name': name, 'expireAfterSeconds': TRAJECTORY_RETENTION_SECONDS})
+            else:
+                logger.info(f'[schema] replacing index {name} of sixGNext.{collection_name} by a TTL index')
+                collection.drop_index(name)
+                collection.create_index([('created_at', ASCENDING)], name='created_at_ttl',
+                                        expireAfterSeconds=TRAJECTORY_RETENTION_SECONDS)
+    else:
+        name, index = created_at_index(collection)
+        if index is not None and 'expireAfterSeconds' in index:
+            collection.drop_index(name)
+
+
+def created_at_index(collection):
+    """
+    Returns:
+        (name, index information) of the index on created_at alone, (None, None) if there is none
+    """
+    for name, index in collection.index_information().items():
+        if [(field, int(direction)) for field, direction in index['key']] == [('created_at', ASCENDING)]:
+            return name, index
+    return None, None
+
+
+def bootstrap_schema(db):
+    """
+    Run ensure_indexes once per container. A failure (e.g. MongoDB not reachable yet) is logged and retried by
+    a later call, after a backoff doubling up to SCHEMA_RETRY_MAX_BACKOFF, so it never prevents the function
+    from serving and an unreachable server does not cost every call a server selection timeout.
+
+    Returns:
+        True once the indexes are in place
+    """
+    global _bootstrapped, _retry_at, _backoff
+    if _bootstrapped:
+        return True
+    if time.monotonic() < _retry_at:
+        return False
+    with _lock:
+        if not _bootstrapped and time.monotonic() >= _retry_at:
+            try:
+                ensure_indexes(db)
+                _bootstrapped = True
+                logger.info('[schema] trajectories indexes are in place')
+            except PyMongoError as e:
+                logger.error(f'[schema] Error ensuring the trajectories indexes, retrying in {_backoff}s: {e}')
+                _retry_at = time.monotonic() + _backoff
+                _backoff = min(_backoff * 2, SCHEMA_RETRY_MAX_BACKOFF)
+    return _bootstrapped
@@ -1,15 +1,66 @@
-from pymongo import MongoClient
+import os
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
 from datetime import datetime
 
-# Create a MongoClient to the running MongoDB instance
-host = "172.17.0.1"  # TODO use ENV variables
-client = MongoClient(f'mongodb://{host}:27017/')
+from mongo_client import get_database
+from schema import bootstrap_schema
+from batch_writer import BatchWriter, install_shutdown_hooks
+
+# write concern of the trajectory writes: w is a number of nodes or 'majority', j waits for the journal
+MONGO_WRITE_CONCERN_W = os.getenv("MONGO_WRITE_CONCERN_W", "1")
+MONGO_WRITE_CONCERN_J = os.getenv("MONGO_WRITE_CONCERN_J", "false").lower() == "true"
+write_concern = WriteConcern(w=int(MONGO_WRITE_CONCERN_W) if MONGO_WRITE_CONCERN_W.isdigit() else MONGO_WRITE_CONCERN_W,
+                             j=MONGO_WRITE_CONCERN_J)
+
+# write-behind batching of the inserts; when disabled every store_update inserts synchronously
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "true").lower() == "true"
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "500"))  # documents
+WRITE_BATCH_DELAY_MS = int(os.getenv("WRITE_BATCH_DELAY_MS", "20"))  # oldest buffered document waits at most this
+WRITE_BARRIER_TIMEOUT = float(os.getenv("WRITE_BARRIER_TIMEOUT", "5"))  # seconds, see wait_for_store
+
+LATEST_POSITIONS = os.getenv("LATEST_POSITIONS", "true").lower() == "true"
+DUPLICATE_KEY = 11000  # server error code
+
+
+def get_trajectories():
+    # the 'trajectories' collection in the 'sixGNext' database, through the pooled client of mongo_client.py
+    return get_database().trajectories.with_options(write_concern=write_concern)
+
+
+def get_latest_positions():
+    # newest trajectory of every UAV, keyed by uav_id, so that trigger reads one document per UAV
+    return get_database().latest_positions.with_options(write_concern=write_concern)
+
 
-# Access the 'trajectories' collection in the 'sixGNext' database
-db = client.sixGNext
-trajectories = db.trajectories
+def write_documents(documents):
+    # same inserts whether 'trajectories' is a plain or a time-series collection (TRAJECTORY_STORAGE in schema)
+    # Insert all the documents into the 'trajectories' collection at once, unordered so one bad document
+    # does not stop the others
+    get_trajectories().insert_many(documents, ordered=False)
+    # for element in documents:
+    #     trajectories.insert_one(element)
+    if LATEST_POSITIONS:
+        upsert_latest_positions(documents)
 
-def store_update(data):
+
+writer = None
+if WRITE_BEHIND:
+    writer = BatchWriter(write_documents, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY_MS / 1000)
+    install_shutdown_hooks(writer)  # buffered documents are written before the container stops
+
+
+def store_update(data, barrier=False):
+    """
+    Store the trajectories, through the write-behind writer if enabled.
+    barrier is True when the caller passes the ticket to wait_for_store.
+
+    Returns:
+        ticket to pass to wait_for_store, or None if the data is already written
+    """
+    bootstrap_schema(get_database())  # no-op once done, retried with backoff after a failed attempt
     # Add a 'created_at' key to all 'data' elements with the current timestamp
     created_time = datetime.now()
     for element in data:
@@ -17,7 +68,43 @@ def store_update(data):
         # in case of mutated release, let mongo generate the _id and not a duplicate of original id
         element.pop('_id', None)
 
-    # Insert all elements of the data into the 'trajectories' collection at once
-    trajectories.insert_many(data)
-    # for element in data:
-    #     trajectories.insert_one(element)
\ No newline at end of file
+    if writer is None:
+        write_documents(data)
+        return None
+    # copies: insert_many adds _id to the documents it writes, later, from the writer thread
+    return writer.submit([dict(element) for element in data], barrier=barrier)
+
+
+def wait_for_store(ticket):
+    """
+    Barrier before trigger: returns once the data of store_update is written, so that trigger reads it.
+    Raises the write error if the batch failed.
+    """
+    if ticket is not None:
+        writer.wait(ticket, timeout=WRITE_BARRIER_TIMEOUT)
+
+
+def upsert_latest_positions(data):
+    """
+    Replace the latest_positions document of every reported UAV with its new trajectory.
+    The history in 'trajectories' is unchanged and stays available for analytics.
+    A document is only replaced by a newer one: when a concurrent invocation already stored a newer trajectory
+    the filter does not match, the upsert collides on _id and that duplicate key error is ignored.
+    """
+    newest = {}
+    for element in data:  # a batch may hold several reports of the same UAV
+        if element['uav_id'] not in newest or element['created_at'] >= newest[element['uav_id']]['created_at']:
+            newest[element['uav_id']] = element
+    operations = []
+    for element in newest.values():
+        latest = {key: value for key, value in element.items() if key != '_id'}  # _id is the history document's
+        operations.append(UpdateOne({'_id': element['uav_id'], 'created_at': {'$lte': element['created_at']}},
+                                    {'$set': latest}, upsert=True))
+    if not operations:
+        return
+    try:
+        get_latest_positions().bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']) \
+                or e.details.get('writeConcernErrors'):
+            raise
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from batch_writer import BatchWriter  # noqa: E402
+
+
+class Sink:
+    """
+    write_batch of the tests: records the batches, fails while failing is set.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.failing = False
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        if self.failing:
+            raise IOError('write failed')
+        self.batches.append(batch)
+
+
+class TestBatchWriter(unittest.TestCase):
+
+    def writer(self, sink, max_batch=100, max_delay=10):
+        writer = BatchWriter(sink, max_batch, max_delay)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_wait_flushes_before_the_delay(self):
+        sink = Sink()
+        writer = self.writer(sink)
+        writer.submit([1, 2])
+        ticket = writer.submit([3], barrier=True)
+        writer.wait(ticket, timeout=1)
+        self.assertEqual(sink.batches, [[1, 2, 3]])
+
+    def test_full_batch_is_written_without_waiting(self):
+        sink = Sink()
+        writer = self.writer(sink, max_batch=2)
+        writer.submit([1, 2])
+        deadline = time.monotonic() + 1
+        while not sink.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sink.batches, [[1, 2]])
+
+    def test_failure_is_delivered_to_the_barrier(self):
+        sink = Sink()
+        sink.failing = True
+        writer = self.writer(sink)
+        ticket = writer.submit([1], barrier=True)
+        with self.assertRaises(IOError):
+            writer.wait(ticket, timeout=1)
+        self.assertEqual(writer._failures, {})
+
+    def test_failure_kept_until_the_barrier_collects_it(self):
+        sink = Sink()
+        sink.failing = True
+        writer = self.writer(sink)
+        ticket = writer.submit([1], barrier=True)
+        writer.submit([2])
+        with self.assertRaises(IOError):
+            writer.flush()  # the batch of both tickets failed
+        with self.assertRaises(IOError):
+            writer.wait(ticket, timeout=1)  # written before this wait, the failure is still reported
+
+    def test_flush_and_a_submitter_waiting_on_the_same_ticket_both_see_the_failure(self):
+        sink = Sink(delay=0.05)
+        sink.failing = True
+        writer = self.writer(sink)
+        ticket = writer.submit([1], barrier=True)
+        outcomes = []
+
+        def wait():
+            try:
+                writer.wait(ticket, timeout=1)
+                outcomes.append('written')
+            except IOError:
+                outcomes.append('failed')
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        try:
+            writer.flush()
+            outcomes.append('written')
+        except IOError:
+            outcomes.append('failed')
+        waiter.join()
+        self.assertEqual(outcomes, ['failed', 'failed'])
+        self.assertEqual(writer._failures, {})
+
+    def test_timed_out_waiter_leaves_nothing_behind(self):
+        sink = Sink(delay=0.2)
+        sink.failing = True
+        writer = self.writer(sink)
+        ticket = writer.submit([1], barrier=True)
+        with self.assertRaises(TimeoutError):
+            writer.wait(ticket, timeout=0.05)
+        writer.close()
+        self.assertEqual(writer._barriers, {})
+        self.assertEqual(writer._failures, {})
+
+    def test_close_writes_the_buffer(self):
+        sink = Sink()
+        writer = self.writer(sink)
+        writer.submit([1])
+        writer.close()
+        self.assertEqual(sink.batches, [[1]])
+        with self.assertRaises(RuntimeError):
+            writer.submit([2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,7 +38,9 @@ func main() {
 	mqttPort := getenv("MQTT_PORT", "1883")
 	mqttTopic := getenv("MQTT_TOPIC", "updates")
 	tinyfaasBase := getenv("TINYFAAS_BASE", "http://localhost:8000")
-	updateURL := fmt.Sprintf("%s/update", trimSlash(tinyfaasBase))
+	// "update" (distributed chain) or "pipeline" (fused in-process chain, see 6gn-functions/pipeline)
+	tinyfaasFunction := getenv("TINYFAAS_FUNCTION", "update")
+	updateURL := fmt.Sprintf("%s/%s", trimSlash(tinyfaasBase), tinyfaasFunction)
 
 	broker := fmt.Sprintf("tcp://%s:%s", mqttHost, mqttPort)
 	log.Infof("MQTT broker: %s, topic: %s", broker, mqttTopic)
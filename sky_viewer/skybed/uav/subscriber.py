@@ -9,18 +9,26 @@ from skybed.message_types import UAV
 from skybed.uav.position import update_trajectory_from_collision_avoidance_msg
 
 _releases_topic = os.getenv("MQTT_RELEASES_TOPIC", "releases")
+# release pubblica ogni UAV su releases/<uav_id>: false per tornare al topic aggregato (RELEASE_AGGREGATE_TOPIC)
+_per_uav_topic = os.getenv("MQTT_RELEASES_PER_UAV", "true").lower() == "true"
 _qos = int(os.getenv("MQTT_QOS", "1"))
 
+def _uav_topic(uav_id: str) -> str:
+    return f"{_releases_topic}/{uav_id}"
+
 def _on_message_for_uav(uav_id: str):
     def _cb(client, userdata, msg):
         try:
             timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
             msg_str = msg.payload.decode("utf-8", errors="replace")
-            # accetta array di UAV o singolo UAV
-            try:
-                uavs: typing.List[UAV] = RootModel[list[UAV]].model_validate_json(msg_str).root
-            except Exception:
-                uavs = [UAV.model_validate_json(msg_str)]
+            if msg.topic == _uav_topic(uav_id):  # topic dedicato: un solo UAV, il nostro
+                uavs: typing.List[UAV] = [UAV.model_validate_json(msg_str)]
+            else:
+                # accetta array di UAV o singolo UAV
+                try:
+                    uavs = RootModel[list[UAV]].model_validate_json(msg_str).root
+                except Exception:
+                    uavs = [UAV.model_validate_json(msg_str)]
 
             applied = False
             for u in uavs:
@@ -47,9 +55,11 @@ def subscribe(ip: str, uav_id: str):
 
     client.on_message = _on_message_for_uav(uav_id)
 
+    topic = _uav_topic(uav_id) if _per_uav_topic else _releases_topic
+
     def _on_connect(c, *_):
-        print(f"[mqtt] connected — subscribing '{_releases_topic}' (QoS={_qos})")
-        c.subscribe(_releases_topic, qos=_qos)
+        print(f"[mqtt] connected — subscribing '{topic}' (QoS={_qos})")
+        c.subscribe(topic, qos=_qos)
 
     client.on_connect = _on_connect
     client.connect(ip, port, keepalive=60)
@@ -4,6 +4,8 @@ import typing
 import http.server
 import socketserver
 
+BINARY_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack", "application/octet-stream")
+
 if __name__ == "__main__":
     try:
         import fn  # type: ignore
@@ -26,10 +28,14 @@ if __name__ == "__main__":
             return
 
         def do_POST(self) -> None:
-            d: typing.Optional[str] = self.rfile.read(
-                int(self.headers["Content-Length"])
-            ).decode("utf-8")
-            if d == "":
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            d: typing.Optional[typing.Union[str, bytes]]
+            # binary payloads (e.g. MessagePack) are passed as bytes, everything else as text
+            if self.headers.get("Content-Type", "").split(";")[0].strip() in BINARY_CONTENT_TYPES:
+                d = body
+            else:
+                d = body.decode("utf-8")
+            if not d:
                 d = None
 
             # Read headers into a dictionary
@@ -40,7 +46,7 @@ if __name__ == "__main__":
                 self.send_response(200)
                 self.end_headers()
                 if res is not None:
-                    self.wfile.write(res.encode("utf-8"))
+                    self.wfile.write(res if isinstance(res, bytes) else res.encode("utf-8"))
 
                 return
             except Exception as e: